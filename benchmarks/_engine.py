@@ -0,0 +1,14 @@
+"""Loads the integration's BLE engine modules without Home Assistant.
+
+The package __init__ sets up config entries and needs Home Assistant, the
+client, publisher and scheduler modules import without any dependency and only
+need bleak and bleak-retry-connector once a client connects
+(`pip install bleak bleak-retry-connector`). The loader is the daemon
+launcher's, vestwoodsbms_daemon.load.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vestwoodsbms_daemon import load  # noqa: E402
@@ -0,0 +1,84 @@
+"""Battery bank aggregation benchmark.
+
+Compares BatteryBank, updated once per pack sample, with template-style
+aggregation that recomputes every bank figure from all packs' entity states
+whenever one of those states changes. Reports the cost and the number of
+aggregate evaluations per pack sample.
+
+    python benchmarks/bench_bank.py --packs 8 --samples 500
+"""
+import argparse
+import time
+
+from _engine import load
+from simulated_bms import SimulatedBMS, client_module
+
+bank_module = load("bank")
+
+PACK_KEYS = ("soc", "nominalCapacity", "surplusCapacity", "totalCurrent", "totalVoltage", "maxCellVoltage", "minCellVoltage")
+
+
+def template_aggregates(states: dict) -> dict:
+    """What one template sensor per bank figure computes, from entity states."""
+    packs = list(states.values())
+    nominal = sum(pack["nominalCapacity"] for pack in packs)
+    return {
+        "soc": round(sum(pack["soc"] * pack["nominalCapacity"] for pack in packs) / nominal, 1),
+        "totalCurrent": round(sum(pack["totalCurrent"] for pack in packs), 2),
+        "totalPower": round(sum(pack["totalVoltage"] * pack["totalCurrent"] for pack in packs), 1),
+        "surplusCapacity": round(sum(pack["surplusCapacity"] for pack in packs), 2),
+        "maxCellVoltage": max(pack["maxCellVoltage"] for pack in packs),
+        "minCellVoltage": min(pack["minCellVoltage"] for pack in packs),
+    }
+
+
+def run(args) -> dict:
+    streams = []
+    for index in range(args.packs):
+        bms = SimulatedBMS(f"AA:BB:CC:DD:EE:{index:02X}", seed=index)
+        streams.append([client_module.decode_sample(bms.frame()) for _ in range(args.samples)])
+    interleaved = [(f"pack{index}", stream[step]) for step in range(args.samples) for index, stream in enumerate(streams)]
+
+    # Template style: every changed pack entity state re-renders every bank template
+    states = {pack_id: dict.fromkeys(PACK_KEYS, 0.0) | {"nominalCapacity": 1.0} for pack_id, _ in interleaved[:args.packs]}
+    renders = 0
+    start = time.perf_counter()
+    for pack_id, sample in interleaved:
+        pack_state = states[pack_id]
+        for key in PACK_KEYS:
+            value = sample[key]
+            if pack_state[key] != value:
+                pack_state[key] = value
+                for _ in range(6):  # One template per bank figure
+                    template_aggregates(states)
+                    renders += 1
+    template_time = time.perf_counter() - start
+
+    bank = bank_module.BatteryBank("bench", stale_after=float("inf"))
+    start = time.perf_counter()
+    for step, (pack_id, sample) in enumerate(interleaved):
+        bank.update(pack_id, sample, step)
+    bank_time = time.perf_counter() - start
+
+    total = len(interleaved)
+    return {
+        "packs": args.packs,
+        "template_us_per_sample": template_time / total * 1e6,
+        "template_renders_per_sample": renders / total,
+        "bank_us_per_sample": bank_time / total * 1e6,
+        "bank_updates_per_sample": 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packs", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=500, help="samples per pack")
+    args = parser.parse_args()
+
+    for key, value in run(args).items():
+        print(f"{key:>28}: {value:.3f}" if isinstance(value, float) else f"{key:>28}: {value}")
+
+
+if __name__ == "__main__":
+    main()
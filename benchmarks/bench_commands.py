@@ -0,0 +1,72 @@
+"""Pipelined command benchmark.
+
+Registers extra commands on the simulated BMS, with placeholder IDs since
+only the status command is known, and compares fetching them together with
+the status in one pipelined exchange against one exchange per command. A
+command TTL shows how much cached answers save.
+
+    python benchmarks/bench_commands.py --commands 3 --latency 0.05 --rounds 20
+"""
+import argparse
+import asyncio
+import time
+
+from simulated_bms import SimulatedAdapter, SimulatedBMS, client_module
+
+PLACEHOLDER_IDS = range(0x7f00, 0x7f40)
+
+
+async def run(args) -> dict:
+    adapter = SimulatedAdapter()
+    adapter.install()
+    bms = adapter.add(SimulatedBMS("AA:BB:CC:DD:EE:01", latency=args.latency))
+    extra = []
+    for command_id in PLACEHOLDER_IDS[:args.commands]:
+        bms.responses[command_id] = bytes(range(16))
+        extra.append(client_module.register_command(
+            client_module.Command(command_id, f"placeholder_{command_id:04x}", bytes, ttl=args.ttl)
+        ))
+    commands = [client_module.STATUS_COMMAND] + extra
+
+    client = client_module.VestwoodsBMSClient(bms.address, None, response_timeout=args.latency * 10 + 1)
+    await client.connect()
+
+    results = {}
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for command in commands:
+            await client.fetch(command)
+        client._cache.clear()
+    results["sequential_ms_per_round"] = (time.perf_counter() - start) / args.rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        answers = await client.fetch(*commands)
+        assert len(answers) == len(commands)
+        client._cache.clear()
+    results["pipelined_ms_per_round"] = (time.perf_counter() - start) / args.rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        await client.fetch(*commands)
+    results["cached_ms_per_round"] = (time.perf_counter() - start) / args.rounds * 1000
+    results["status_frames"] = bms.frames_sent
+
+    await client.disconnect()
+    return {"commands": len(commands), **results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=3, help="extra commands besides status")
+    parser.add_argument("--latency", type=float, default=0.05, help="BMS response latency in seconds")
+    parser.add_argument("--ttl", type=float, default=3600.0, help="TTL of the extra commands in seconds")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for key, value in asyncio.run(run(args)).items():
+        print(f"{key:>24}: {value:.3f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""CRC16/MODBUS equivalence check and benchmark.
+
+Keeps the original bit-by-bit calc_crc as the reference. Checks calc_crc, and
+crc_update fed the same bytes in random chunks, against it over random
+buffers of random length, then reports the throughput of both and the
+speedup of the lookup table.
+
+    python benchmarks/bench_crc.py --buffers 20000 --seed 1
+"""
+import argparse
+import random
+import sys
+import time
+
+from simulated_bms import client_module
+
+
+def reference_crc(data) -> int:
+    """The original bit-loop CRC16/MODBUS (poly 0xA001, init 0xFFFF)."""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+    return crc & 0xFFFF
+
+
+def check(rng: random.Random, buffers: int) -> int:
+    """Returns how many buffers were checked; raises on the first mismatch."""
+    for _ in range(buffers):
+        data = rng.randbytes(rng.randrange(0, 300))
+        expected = reference_crc(data)
+        if client_module.calc_crc(data) != expected:
+            raise AssertionError(f"calc_crc differs on {data.hex()}")
+        crc = client_module.CRC_INIT
+        position = 0
+        while position < len(data):
+            size = rng.randrange(1, 32)
+            crc = client_module.crc_update(crc, memoryview(data)[position:position + size])
+            position += size
+        if crc != expected:
+            raise AssertionError(f"chunked crc_update differs on {data.hex()}")
+    return buffers
+
+
+def throughput(function, data: bytes, repeats: int) -> float:
+    """Returns MiB/s of the fastest of repeats calls."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(data)
+        best = min(best, time.perf_counter() - start)
+    return len(data) / best / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buffers", type=int, default=20000, help="random buffers to check")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="bytes per throughput run")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    try:
+        checked = check(rng, args.buffers)
+    except AssertionError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+    print(f"{checked} random buffers, whole and chunked: ok")
+
+    data = rng.randbytes(args.size)
+    reference = throughput(reference_crc, data, args.repeats)
+    table = throughput(client_module.calc_crc, data, args.repeats)
+    print(f"{'bit_loop_mib_per_sec':>22}: {reference:.2f}")
+    print(f"{'table_mib_per_sec':>22}: {table:.2f}")
+    print(f"{'speedup':>22}: {table / reference:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
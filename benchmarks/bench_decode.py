@@ -0,0 +1,82 @@
+"""Status frame decode benchmark and golden-frame equivalence check.
+
+golden_frames.json holds status frames (simulated packs, and random raw field
+values including all-zero and all-ones fields, bit 15 set on cell words and
+sub-zero temperatures) with the dict the original per-field parse_response
+of the baseline commit returned for each. Checks that parse_response and
+decode_sample(...).as_dict() still return exactly those dicts, then reports
+frames/sec of both decoders.
+
+    python benchmarks/bench_decode.py --frames 5000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from simulated_bms import SimulatedBMS, client_module
+
+GOLDEN_FRAMES = Path(__file__).resolve().parent / "golden_frames.json"
+
+
+def check_golden(path: Path) -> int:
+    """Returns how many golden frames were checked; raises on the first mismatch."""
+    golden = json.loads(path.read_text())
+    for case in golden:
+        frame = bytes.fromhex(case["frame"])
+        expected = case["expected"]
+        parsed = client_module.parse_response(bytearray(frame))
+        if parsed != expected:
+            raise AssertionError(f"parse_response differs on {case['name']}: {parsed} != {expected}")
+        decoded = client_module.decode_sample(frame).as_dict()
+        if decoded != expected:
+            raise AssertionError(f"decode_sample differs on {case['name']}: {decoded} != {expected}")
+    return len(golden)
+
+
+def run(args) -> dict:
+    bms = SimulatedBMS("AA:BB:CC:DD:EE:01", cells=args.cells, seed=0)
+    frames = [bytearray(bms.frame()) for _ in range(args.frames)]
+
+    start = time.perf_counter()
+    for frame in frames:
+        client_module.parse_response(frame)
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames:
+        client_module.decode_sample(frame)
+    decode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames:
+        client_module.decode_sample(frame).as_dict()
+    as_dict = time.perf_counter() - start
+
+    return {
+        "frames": args.frames,
+        "parse_response_per_sec": args.frames / parse,
+        "decode_sample_per_sec": args.frames / decode,
+        "decode_as_dict_per_sec": args.frames / as_dict,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--cells", type=int, default=16)
+    args = parser.parse_args()
+
+    try:
+        checked = check_golden(GOLDEN_FRAMES)
+    except AssertionError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+    print(f"{checked} golden frames: ok")
+    for key, value in run(args).items():
+        print(f"{key:>24}: {value:.1f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
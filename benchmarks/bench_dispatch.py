@@ -0,0 +1,141 @@
+"""Sample dispatch benchmark.
+
+Compares handing every sample to every entity of a pack (each entity re-reads
+its value and writes its state) with KeyDispatcher, which calls only the
+entities whose value changed. Reports dispatch cost and state writes per
+sample for many packs. Checks first that listeners can add and remove
+listeners while a sample is being dispatched, as the layout listener does
+when it adds the cell sensors of a pack's first sample.
+
+    python benchmarks/bench_dispatch.py --packs 10 --samples 500
+"""
+import argparse
+import time
+
+from _engine import load
+from simulated_bms import SimulatedBMS, client_module
+
+dispatch = load("dispatch")
+
+CORE_KEYS = (
+    "totalVoltage", "soc", "totalCurrent", "environmentalTemperature", "pcbTemperature",
+    "soh", "actualCapacity", "surplusCapacity", "nominalCapacity", "cycleIndex",
+    "maxCellVoltage", "minCellVoltage", "maxTemperatureCellValue", "minTemperatureCellValue",
+)
+
+
+def value_getter(key: str):
+    """Same lookups as sensor._value_getter."""
+    if key.startswith("cellVoltage_"):
+        index = int(key[len("cellVoltage_"):]) - 1
+        return lambda sample: sample.cell_voltage(index) if index < sample.cell_count else None
+    if key.startswith("cellTemperature_"):
+        index = int(key[len("cellTemperature_"):]) - 1
+        return lambda sample: sample.temperature(index) if index < sample.temperature_count else None
+    return lambda sample: sample.get(key)
+
+
+class Entity:
+    """Stands in for a sensor; counts state writes."""
+
+    writes = 0
+
+    def __init__(self, key: str):
+        self.key = key
+        self.value = value_getter(key)
+        self.native_value = None
+
+    def handle_sample(self, sample):
+        self.native_value = self.value(sample)
+        Entity.writes += 1
+
+    def handle_value(self, value):
+        self.native_value = value
+        Entity.writes += 1
+
+
+def check_listener_changes(sample):
+    """Adds and removes listeners from inside a dispatch, like sensor._CellSensors."""
+    dispatcher = dispatch.KeyDispatcher()
+    seen = {}
+    removers = {}
+
+    def add_cells(layout):
+        for i in range(layout[0]):
+            key = f"cellVoltage_{i + 1}"
+            removers[key] = dispatcher.add_listener(key, value_getter(key), lambda value, key=key: seen.__setitem__(key, value))
+
+    def remove_soc(value):
+        removers.pop("soc")()
+
+    dispatcher.add_listener("layout", lambda sample: (sample.cell_count, sample.temperature_count), add_cells)
+    dispatcher.add_listener("totalVoltage", value_getter("totalVoltage"), remove_soc)
+    removers["soc"] = dispatcher.add_listener("soc", value_getter("soc"), lambda value: seen.__setitem__("soc", value))
+    dispatcher.dispatch(sample)
+
+    assert "soc" not in seen, "removed listener was called"
+    assert seen == {f"cellVoltage_{i + 1}": sample.cell_voltage(i) for i in range(sample.cell_count)}, seen
+    seen.clear()
+    assert dispatcher.dispatch(sample) == 0, "unchanged sample called listeners"
+
+
+def run(args) -> dict:
+    keys = CORE_KEYS + tuple(f"cellVoltage_{i + 1}" for i in range(args.cells)) + tuple(
+        f"cellTemperature_{i + 1}" for i in range(args.temperatures)
+    )
+    packs = []
+    for index in range(args.packs):
+        bms = SimulatedBMS(f"AA:BB:CC:DD:EE:{index:02X}", cells=args.cells, temperatures=args.temperatures, seed=index)
+        samples = [client_module.decode_sample(bms.frame()) for _ in range(args.samples)]
+        packs.append((samples, [Entity(key) for key in keys]))
+
+    Entity.writes = 0
+    start = time.perf_counter()
+    for samples, entities in packs:
+        for sample in samples:
+            for entity in entities:
+                entity.handle_sample(sample)
+    broadcast_time = time.perf_counter() - start
+    broadcast_writes = Entity.writes
+
+    dispatchers = []
+    for samples, entities in packs:
+        dispatcher = dispatch.KeyDispatcher()
+        for entity in entities:
+            dispatcher.add_listener(entity.key, entity.value, entity.handle_value)
+        dispatchers.append(dispatcher)
+    Entity.writes = 0
+    start = time.perf_counter()
+    for dispatcher, (samples, _) in zip(dispatchers, packs):
+        for sample in samples:
+            dispatcher.dispatch(sample)
+    keyed_time = time.perf_counter() - start
+    keyed_writes = Entity.writes
+
+    total = args.packs * args.samples
+    return {
+        "packs": args.packs,
+        "entities_per_pack": len(keys),
+        "broadcast_us_per_sample": broadcast_time / total * 1e6,
+        "broadcast_writes_per_sample": broadcast_writes / total,
+        "keyed_us_per_sample": keyed_time / total * 1e6,
+        "keyed_writes_per_sample": keyed_writes / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packs", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=500, help="samples per pack")
+    parser.add_argument("--cells", type=int, default=16)
+    parser.add_argument("--temperatures", type=int, default=4)
+    args = parser.parse_args()
+
+    check_listener_changes(client_module.decode_sample(SimulatedBMS("AA:BB:CC:DD:EE:00", cells=args.cells).frame()))
+    print("listener changes during dispatch: ok")
+    for key, value in run(args).items():
+        print(f"{key:>28}: {value:.3f}" if isinstance(value, float) else f"{key:>28}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Per-pack memory and CPU footprint of the headless engine.
+
+Runs the daemon's clients and scheduler against simulated packs and reports
+the Python heap held per pack (tracemalloc), the process RSS and the CPU
+spent per sample. tracemalloc slows everything down, so use --no-heap for
+CPU figures. The HA-hosted path adds the coordinator and entities on
+top; measure it on the target with Home Assistant's profiler integration.
+
+    python benchmarks/bench_footprint.py --packs 8 --seconds 20 --interval 1
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+import tracemalloc
+
+from _engine import load
+from simulated_bms import SimulatedAdapter, SimulatedBMS, client_module
+
+daemon = load("daemon")
+sinks = load("sinks")
+
+
+class CountingSink(sinks.Sink):
+    def __init__(self):
+        self.samples = 0
+
+    async def async_publish(self, sample):
+        self.samples += 1
+
+
+async def run(args) -> dict:
+    adapter = SimulatedAdapter()
+    adapter.install()
+    options = daemon.parse_args([
+        "00:00:00:00:00:00",
+        "--refresh-interval", str(args.interval),
+        "--min-refresh-interval", str(args.interval),
+        "--max-refresh-interval", str(args.interval),
+        "--max-connections", str(args.packs),
+    ])
+    addresses = [f"AA:BB:CC:DD:{index // 256:02X}:{index % 256:02X}" for index in range(args.packs)]
+    for address in addresses:
+        adapter.add(SimulatedBMS(address, latency=args.latency, seed=len(adapter.devices)))
+
+    # Module imports are not part of the per-pack cost
+    client_module.import_ble()
+    devnull = open(os.devnull, "w")
+
+    if args.heap:
+        tracemalloc.start()
+    heap_before = tracemalloc.get_traced_memory()[0]
+    clients = daemon.create_clients(addresses, options)
+    counter = CountingSink()
+    for client in clients:
+        client.sinks = [sinks.JsonLinesSink(client.mac_address, devnull), counter]
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().call_later(args.seconds, stop.set)
+    cpu_start = time.process_time()
+    await daemon.run(clients, options, stop)
+    cpu = time.process_time() - cpu_start
+    heap = tracemalloc.get_traced_memory()[0] - heap_before
+    tracemalloc.stop()
+    devnull.close()
+
+    return {
+        "packs": args.packs,
+        "samples": counter.samples,
+        "heap_kib_per_pack": heap / args.packs / 1024 if args.heap else float("nan"),
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "cpu_ms_per_sample": cpu / max(counter.samples, 1) * 1000,
+        "cpu_percent": cpu / args.seconds * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packs", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--interval", type=int, default=1, help="refresh interval in seconds")
+    parser.add_argument("--no-heap", dest="heap", action="store_false", help="skip tracemalloc")
+    parser.add_argument("--latency", type=float, default=0.05, help="BMS response latency in seconds")
+    args = parser.parse_args()
+
+    for key, value in asyncio.run(run(args)).items():
+        print(f"{key:>18}: {value:.3f}" if isinstance(value, float) else f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Frame log round trip check and batch decode benchmark.
+
+Writes simulated status frames through FrameLogWriter with a small
+--max-bytes so the log rotates, and checks that every file stays within the
+limit and that iter_records reads back every frame, in order. Then checks
+read_columns, with and without NumPy, on a log mixing two layouts and frames
+of another command (rows in log order, other commands skipped, values equal
+to decode_sample's), and on empty logs, and that a log that cannot be
+written drops its frames instead of raising. Finally reports frames/sec of
+read_columns on a large single-layout log against parse_response per frame.
+
+    python benchmarks/bench_frame_log.py --frames 200000
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from _engine import load
+from simulated_bms import SimulatedBMS, client_module
+
+frame_log = load("frame_log")
+
+
+@contextmanager
+def without_numpy():
+    saved = sys.modules.get("numpy")
+    sys.modules["numpy"] = None
+    try:
+        yield
+    finally:
+        if saved is None:
+            del sys.modules["numpy"]
+        else:
+            sys.modules["numpy"] = saved
+
+
+async def write_log(path: str, frames: list, max_bytes: int = 16 * 1024 * 1024, backup_count: int = 5, batch: int = 10):
+    writer = frame_log.FrameLogWriter(path, max_bytes=max_bytes, backup_count=backup_count)
+    for index, frame in enumerate(frames):
+        writer.append(frame, timestamp=1_700_000_000.0 + index)
+        if index % batch == batch - 1:
+            await writer.async_flush()
+    await writer.async_flush()
+
+
+def check_rotation(directory: str, args):
+    bms = SimulatedBMS("AA:BB:CC:DD:EE:01")
+    frames = [bms.frame() for _ in range(args.rotation_frames)]
+    path = os.path.join(directory, "rotate.log")
+    asyncio.run(write_log(path, frames, max_bytes=args.max_bytes, backup_count=args.backup_count))
+
+    files = [path] + [f"{path}.{index}" for index in range(1, args.backup_count + 1) if os.path.exists(f"{path}.{index}")]
+    assert len(files) > 1, "log did not rotate"
+    assert not os.path.exists(f"{path}.{args.backup_count + 1}"), "kept more than backup_count files"
+    for file in files:
+        assert os.path.getsize(file) <= args.max_bytes, f"{file} is larger than max_bytes"
+
+    # Oldest file first; the newest frames must all be there, in order
+    records = [record for file in reversed(files) for record in frame_log.iter_records(file)]
+    assert [bytes(frame) for _, frame in records] == frames[len(frames) - len(records):], "frames lost or reordered"
+    assert [timestamp for timestamp, _ in records] == sorted(timestamp for timestamp, _ in records)
+    return len(files), len(records)
+
+
+def check_columns(directory: str):
+    small = SimulatedBMS("AA:BB:CC:DD:EE:02", cells=4, temperatures=1)
+    large = SimulatedBMS("AA:BB:CC:DD:EE:03", cells=16, temperatures=4)
+    frames = []
+    for index in range(30):
+        frames.append((small if index % 3 else large).frame())
+        if index % 7 == 0:
+            frames.append(client_module.build_command(0x0002, b"\x01\x02"))
+    path = os.path.join(directory, "mixed.log")
+    asyncio.run(write_log(path, frames))
+    status = [frame for frame in frames if client_module.frame_command(frame) == 0x0001]
+    timestamps = [1_700_000_000.0 + index for index, frame in enumerate(frames) if client_module.frame_command(frame) == 0x0001]
+
+    def check(columns):
+        assert list(columns["timestamp"]) == timestamps, "rows out of log order or other commands decoded"
+        for row, frame in enumerate(status):
+            sample = client_module.decode_sample(frame)
+            assert math.isclose(columns["soc"][row], sample.soc, abs_tol=1e-9)
+            for cell in range(16):
+                value = columns[f"cellVoltage_{cell + 1}"][row]
+                if cell < sample.cell_count:
+                    assert math.isclose(value, sample.cell_voltage(cell), abs_tol=1e-9)
+                else:
+                    assert math.isnan(value)
+
+    check(frame_log.read_columns(path))
+    with without_numpy():
+        check(frame_log.read_columns(path))
+
+    for name, content in (("empty.log", b""), ("magic.log", frame_log.MAGIC)):
+        empty = os.path.join(directory, name)
+        with open(empty, "wb") as log:
+            log.write(content)
+        assert len(frame_log.read_columns(empty)["timestamp"]) == 0
+        with without_numpy():
+            assert len(frame_log.read_columns(empty)["timestamp"]) == 0
+
+
+def check_unwritable(directory: str):
+    # A directory that is a file cannot hold the log
+    blocker = os.path.join(directory, "blocker")
+    with open(blocker, "wb"):
+        pass
+    writer = frame_log.FrameLogWriter(os.path.join(blocker, "frames.log"))
+    frame = SimulatedBMS("AA:BB:CC:DD:EE:05").frame()
+    logger = logging.getLogger(frame_log.__name__)
+    level, logger.level = logger.level, logging.ERROR
+    try:
+        for _ in range(3):
+            writer.append(frame)
+            asyncio.run(writer.async_flush())
+    except OSError as error:
+        raise AssertionError(f"unwritable log raised {error!r}")
+    finally:
+        logger.setLevel(level)
+    assert not writer._pending, "unwritable log kept its frames"
+    assert writer.dropped_bytes == 3 * (frame_log.RECORD_HEADER.size + len(frame))
+
+
+def benchmark(directory: str, args) -> dict:
+    bms = SimulatedBMS("AA:BB:CC:DD:EE:04")
+    frames = [bms.frame() for _ in range(args.frames)]
+    path = os.path.join(directory, "large.log")
+    asyncio.run(write_log(path, frames, batch=1000))
+
+    start = time.perf_counter()
+    frame_log.read_columns(path)
+    columns = time.perf_counter() - start
+    with without_numpy():
+        start = time.perf_counter()
+        frame_log.read_columns(path)
+        python = time.perf_counter() - start
+    start = time.perf_counter()
+    for _, frame in frame_log.iter_records(path):
+        client_module.parse_response(bytearray(frame))
+    parse = time.perf_counter() - start
+
+    return {
+        "frames": args.frames,
+        "log_mib": os.path.getsize(path) / 2**20,
+        "read_columns_per_sec": args.frames / columns,
+        "python_columns_per_sec": args.frames / python,
+        "parse_response_per_sec": args.frames / parse,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100000, help="frames in the benchmark log")
+    parser.add_argument("--rotation-frames", type=int, default=2000)
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--backup-count", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            files, records = check_rotation(directory, args)
+            check_columns(directory)
+            check_unwritable(directory)
+        except AssertionError as error:
+            print(f"check failed: {error}", file=sys.stderr)
+            sys.exit(1)
+        print(f"rotation ({files} files, {records} frames kept), mixed layouts, other commands, empty logs, unwritable log: ok")
+        for key, value in benchmark(directory, args).items():
+            print(f"{key:>24}: {value:.1f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
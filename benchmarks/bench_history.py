@@ -0,0 +1,67 @@
+"""Rolling history benchmark.
+
+Appends simulated samples to a SampleHistory at a fixed sample rate and reports
+the cost per append (including window eviction) and per window summary.
+
+    python benchmarks/bench_history.py --samples 200000 --rate 10 --capacity 36000
+"""
+import argparse
+import time
+
+from _engine import load
+from simulated_bms import SimulatedBMS, client_module
+
+history_module = load("history")
+
+
+def run(args) -> dict:
+    bms = SimulatedBMS("AA:BB:CC:DD:EE:01", cells=args.cells, seed=args.seed)
+    samples = [client_module.decode_sample(bms.frame()) for _ in range(args.distinct)]
+    history = history_module.SampleHistory(args.capacity)
+    step = 1.0 / args.rate
+
+    start = time.perf_counter()
+    for i in range(args.samples):
+        history.append(samples[i % len(samples)], i * step)
+    append = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.summaries):
+        for window in history.windows:
+            history._summaries.clear()
+            history.summary(window)
+    summary = time.perf_counter() - start
+
+    return {
+        "samples": args.samples,
+        "capacity": args.capacity,
+        "retained": len(history),
+        "appends_per_sec": args.samples / append,
+        "append_us": append / args.samples * 1e6,
+        "summary_us": summary / (args.summaries * len(history.windows)) * 1e6,
+        "buffer_kib": (
+            history.timestamps.itemsize * len(history.timestamps)
+            + history.currents.itemsize * len(history.currents)
+            + history.spreads.itemsize * len(history.spreads)
+            + history.cells.itemsize * len(history.cells)
+        ) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100000)
+    parser.add_argument("--rate", type=float, default=10.0, help="samples per second")
+    parser.add_argument("--capacity", type=int, default=history_module.DEFAULT_HISTORY_SIZE)
+    parser.add_argument("--cells", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=1000, help="distinct samples to cycle through")
+    parser.add_argument("--summaries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for key, value in run(args).items():
+        print(f"{key:>16}: {value:.3f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
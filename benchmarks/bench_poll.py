@@ -0,0 +1,116 @@
+"""End-to-end poll benchmark against a simulated BMS.
+
+Runs VestwoodsBMSClient.poll() back to back against SimulatedBMS, with MQTT
+replaced by an in-memory sink, and reports poll latency, samples/sec, publishes
+per sample and CPU per sample.
+
+    python benchmarks/bench_poll.py --polls 2000 --chunk-size 20 --corruption 0.01
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from _engine import load
+from simulated_bms import SimulatedAdapter, SimulatedBMS, client_module
+
+mqtt_publisher = load("mqtt_publisher")
+
+
+class MemoryPublisher(mqtt_publisher.MqttPublisher):
+    """MqttPublisher that keeps messages in memory instead of sending them."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(None, *args, **kwargs)
+        self.messages = []
+
+    async def _send(self, topic: str, payload: str):
+        self.messages.append((topic, payload))
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(args) -> dict:
+    adapter = SimulatedAdapter()
+    adapter.install()
+    bms = adapter.add(SimulatedBMS(
+        "AA:BB:CC:DD:EE:01",
+        cells=args.cells,
+        temperatures=args.temperatures,
+        chunk_size=args.chunk_size,
+        latency=args.latency,
+        corruption_rate=args.corruption,
+        disconnect_rate=args.disconnects,
+        seed=args.seed,
+    ))
+    publisher = MemoryPublisher(
+        "vestwoodsbms/bench", mode=args.mode, changes_only=args.changes_only
+    )
+    client = client_module.VestwoodsBMSClient(
+        bms.address, None, response_timeout=args.timeout, sinks=[publisher]
+    )
+
+    if args.profile:
+        client.start_profile(args.polls, args.profile)
+
+    latencies = []
+    samples = 0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(args.polls):
+        start = time.perf_counter()
+        if await client.poll() is client_module.PollResult.SAMPLE:
+            samples += 1
+            latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    await client.disconnect()
+    diagnostics = client.diagnostics()
+
+    return {
+        "polls": args.polls,
+        "samples": samples,
+        "connections": adapter.connections,
+        "p50_ms": percentile(latencies, 0.50) * 1000 if latencies else float("nan"),
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else float("nan"),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "samples_per_sec": samples / wall,
+        "publishes_per_sample": len(publisher.messages) / max(samples, 1),
+        "cpu_us_per_sample": cpu / max(samples, 1) * 1e6,
+        **{
+            f"{stage}_us_per_poll": total / max(diagnostics["polls"], 1) * 1e6
+            for stage, total in diagnostics["total"].items()
+            if stage not in ("scan", "connect")
+        },
+        "crc_failures": diagnostics["crcFailures"],
+        "resyncs": diagnostics["resyncs"],
+        "timeouts": diagnostics["timeouts"],
+        "reconnects": diagnostics["reconnects"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=1000)
+    parser.add_argument("--cells", type=int, default=16)
+    parser.add_argument("--temperatures", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=20, help="notification payload size in bytes")
+    parser.add_argument("--latency", type=float, default=0.0, help="BMS response latency in seconds")
+    parser.add_argument("--corruption", type=float, default=0.0, help="fraction of frames with a flipped bit")
+    parser.add_argument("--disconnects", type=float, default=0.0, help="fraction of polls that drop the link")
+    parser.add_argument("--timeout", type=float, default=0.5, help="client response timeout in seconds")
+    parser.add_argument("--mode", choices=mqtt_publisher.PUBLISH_MODES, default=mqtt_publisher.PUBLISH_MODE_TOPICS)
+    parser.add_argument("--changes-only", action="store_true")
+    parser.add_argument("--profile", metavar="PATH", help="write a cProfile of the run to PATH")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for key, value in asyncio.run(run(args)).items():
+        print(f"{key:>22}: {value:.3f}" if isinstance(value, float) else f"{key:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
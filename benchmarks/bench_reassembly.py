@@ -0,0 +1,145 @@
+"""Frame reassembler stress test.
+
+Feeds megabytes of status frames mixed with random noise and corrupted bytes
+to FrameReassembler in random notification-sized chunks, and reports the
+throughput, the frames recovered and the tracemalloc peak. Checks that the
+receive buffer never holds more than its max_size unread bytes, even when a
+single chunk is larger than that, and that a stream made only of start
+sentinels (every byte a resync) costs linear time: eight times the input,
+timed best of --repeats, must cost at most --max-scaling times as much per
+byte.
+
+    python benchmarks/bench_reassembly.py --megabytes 8 --max-buffer 4096
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+import tracemalloc
+
+from simulated_bms import SimulatedBMS, client_module
+
+
+def noisy_stream(rng: random.Random, size: int, corruption: float) -> tuple:
+    """Returns (stream, frame count) of frames, noise bursts and flipped bytes."""
+    bms = SimulatedBMS("AA:BB:CC:DD:EE:01", seed=rng.randrange(1 << 30))
+    stream = bytearray()
+    frames = 0
+    while len(stream) < size:
+        if rng.random() < 0.2:
+            stream += rng.randbytes(rng.randrange(1, 200))
+        frame = bytearray(bms.frame())
+        if rng.random() < corruption:
+            frame[rng.randrange(len(frame))] ^= 1 << rng.randrange(8)
+        stream += frame
+        frames += 1
+    return bytes(stream), frames
+
+
+def feed(stream: bytes, chunk_sizes: list, max_buffer: int) -> dict:
+    """Feeds a stream in the given chunk sizes, checking the buffer cap after each chunk."""
+    delivered = 0
+
+    def on_frame(frame):
+        nonlocal delivered
+        delivered += 1
+
+    reassembler = client_module.FrameReassembler(on_frame, max_buffer=max_buffer)
+    buffer = reassembler.buffer
+    largest = 0
+    position = 0
+    start = time.perf_counter()
+    for size in chunk_sizes:
+        reassembler.feed(stream[position:position + size])
+        position += size
+        if len(buffer) > max_buffer:
+            raise AssertionError(f"buffer holds {len(buffer)} unread bytes, cap is {max_buffer}")
+        largest = max(largest, len(buffer._data))
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "frames": delivered, "largest_storage": largest, "reassembler": reassembler}
+
+
+def chunking(rng: random.Random, length: int, largest: int) -> list:
+    sizes = []
+    while length > 0:
+        sizes.append(min(rng.randrange(1, largest + 1), length))
+        length -= sizes[-1]
+    return sizes
+
+
+def best_seconds(stream: bytes, args) -> float:
+    """Returns the fastest of --repeats feeds of stream in the same chunks."""
+    chunks = chunking(random.Random(0), len(stream), args.chunk_size)
+    return min(feed(stream, chunks, args.max_buffer)["seconds"] for _ in range(args.repeats))
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    size = int(args.megabytes * 2**20)
+
+    stream, frames = noisy_stream(rng, size, args.corruption)
+    chunks = chunking(rng, len(stream), args.chunk_size)
+    tracemalloc.start()
+    noisy = feed(stream, chunks, args.max_buffer)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # One chunk bigger than the cap keeps only its newest max_buffer bytes
+    chunk = rng.randbytes(args.max_buffer * 3)
+    buffer = client_module.ReceiveBuffer(args.max_buffer)
+    buffer.extend(rng.randbytes(100))
+    if buffer.extend(chunk) != 100 + len(chunk) - args.max_buffer or buffer.take(len(buffer)) != chunk[-args.max_buffer:]:
+        raise AssertionError("oversized chunk was not cut down to the newest max_buffer bytes")
+    oversized = feed(chunk.replace(b"\x7a", b"\x00"), [len(chunk)], args.max_buffer)
+    if oversized["reassembler"].discarded_bytes != len(chunk):
+        raise AssertionError("oversized noise chunk was not discarded whole")
+
+    # Only start sentinels: the length byte (0x7a) always points past a bad end sentinel.
+    # A quadratic scan would cost 8x as much per byte on 8x the input.
+    sentinels = b"\x7a" * (size // 4)
+    short = sentinels[:len(sentinels) // 8]
+    short_seconds = best_seconds(short, args)
+    full_seconds = best_seconds(sentinels, args)
+    scaling = full_seconds / short_seconds / 8
+    if scaling > args.max_scaling:
+        raise AssertionError(f"8x the sentinel stream cost {scaling:.1f}x as much per byte")
+
+    return {
+        "stream_mib": len(stream) / 2**20,
+        "noisy_mib_per_sec": len(stream) / noisy["seconds"] / 2**20,
+        "frames_sent": frames,
+        "frames_recovered": noisy["frames"],
+        "crc_failures": noisy["reassembler"].crc_failures,
+        "resyncs": noisy["reassembler"].resyncs,
+        "peak_kib": peak / 1024,
+        "largest_storage_bytes": noisy["largest_storage"],
+        "sentinel_mib_per_sec": len(sentinels) / full_seconds / 2**20,
+        "sentinel_per_byte_ratio": scaling,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=4.0)
+    parser.add_argument("--chunk-size", type=int, default=244, help="largest notification in bytes")
+    parser.add_argument("--corruption", type=float, default=0.05, help="fraction of frames with a flipped bit")
+    parser.add_argument("--max-buffer", type=int, default=4096)
+    parser.add_argument("--max-scaling", type=float, default=3.0, help="allowed per-byte time ratio for 8x the input")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs of each sentinel stream")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Every resync and CRC failure is logged
+    logging.disable(logging.WARNING)
+    try:
+        results = run(args)
+    except AssertionError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+    for key, value in results.items():
+        print(f"{key:>24}: {value:.3f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Throughput regression check for the hot decode path.
+
+Measures calc_crc, parse_response, decode_sample on good and malformed
+frames, and FrameReassembler.feed on a stream of frames split into BLE
+notification sized chunks, taking the best of several repeats. Compares the
+results with baseline.json and exits nonzero when any of them is more than
+--margin slower, after re-measuring up to --retries times to rule out a
+busy machine. Baselines only compare on the machine and Python that made
+them; run with --update there to record one.
+
+    python benchmarks/bench_regression.py
+    python benchmarks/bench_regression.py --update
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+from pathlib import Path
+
+from fuzz_decoder import read_corpus, CORPUS
+from simulated_bms import SimulatedBMS, client_module
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def best_rate(function, items: int, repeats: int, min_time: float = 0.05) -> float:
+    """Returns items per second of the fastest of repeats timed runs of function.
+
+    A warm-up call sizes each run to enough calls to last min_time.
+    """
+    start = time.perf_counter()
+    function()
+    calls = max(1, round(min_time / (time.perf_counter() - start)))
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return items * calls / best
+
+
+def run(args) -> dict:
+    bms = SimulatedBMS("AA:BB:CC:DD:EE:01", cells=args.cells, seed=0)
+    frames = [bms.frame() for _ in range(args.frames)]
+    malformed = [frame for _, accept, frame in read_corpus(CORPUS) if not accept]
+    malformed = (malformed * (args.frames // len(malformed) + 1))[:args.frames]
+    crc_data = bytes(range(256)) * 16
+
+    def crc():
+        client_module.calc_crc(crc_data)
+
+    def parse():
+        for frame in frames:
+            client_module.parse_response(frame)
+
+    def decode():
+        for frame in frames:
+            client_module.decode_sample(frame)
+
+    def reject():
+        for frame in malformed:
+            client_module.decode_sample(frame)
+
+    stream = b"".join(frames)
+    chunks = [stream[i:i + args.chunk_size] for i in range(0, len(stream), args.chunk_size)]
+
+    def reassemble():
+        delivered = []
+        reassembler = client_module.FrameReassembler(delivered.append)
+        for chunk in chunks:
+            reassembler.feed(chunk)
+        assert len(delivered) == len(frames)
+
+    return {
+        "crc_mib_per_sec": best_rate(crc, len(crc_data) / 2**20, args.repeats),
+        "parse_response_per_sec": best_rate(parse, len(frames), args.repeats),
+        "decode_sample_per_sec": best_rate(decode, len(frames), args.repeats),
+        "reject_malformed_per_sec": best_rate(reject, len(malformed), args.repeats),
+        "reassembly_frames_per_sec": best_rate(reassemble, len(frames), args.repeats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--cells", type=int, default=16)
+    parser.add_argument("--chunk-size", type=int, default=20, help="notification size in bytes")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--margin", type=float, default=0.25, help="allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--retries", type=int, default=3, help="re-measurements before a slowdown counts")
+    parser.add_argument("--retry-delay", type=float, default=2.0, help="seconds to wait before re-measuring")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="record the results as the new baseline")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = run(args)
+
+    if args.update:
+        args.baseline.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": {key: round(value, 1) for key, value in results.items()},
+        }, indent=2) + "\n")
+        for key, value in results.items():
+            print(f"{key:>26}: {value:.1f}")
+        print(f"Wrote {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["python"] != platform.python_version() or baseline["machine"] != platform.machine():
+        print(f"Baseline is from Python {baseline['python']} on {baseline['machine']}, results may not compare.")
+    expected = baseline["results"]
+    for _ in range(args.retries):
+        if all(value >= expected.get(key, 0) * (1 - args.margin) for key, value in results.items()):
+            break
+        time.sleep(args.retry_delay)
+        results = {key: max(value, results[key]) for key, value in run(args).items()}
+
+    failed = []
+    for key, value in results.items():
+        if key not in expected:
+            print(f"{key:>26}: {value:.1f} (no baseline)")
+            continue
+        change = value / expected[key] - 1
+        regressed = change < -args.margin
+        print(f"{key:>26}: {value:.1f} vs {expected[key]:.1f} ({change:+.0%}){' REGRESSED' if regressed else ''}")
+        if regressed:
+            failed.append(key)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Scheduler scaling benchmark.
+
+Polls growing numbers of simulated packs through BLEScheduler on one
+simulated adapter with --slots connection slots, and reports the aggregate
+samples/sec against the ideal of packs / interval for each pack count, with
+whether the scheduler kept connections open or rotated them, the most links
+the adapter saw at once, refused connects, timeouts and the errors logged.
+With --corruption some answers fail their CRC and time out; they must not be
+logged as unreachable packs. Before that it checks that a disconnect that
+raises does not stop the polling of two packs sharing one slot.
+
+    python benchmarks/bench_scheduler.py --packs 1 2 4 8 12 --slots 3 --seconds 10
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from _engine import load
+from simulated_bms import SimulatedAdapter, SimulatedBleakClient, SimulatedBMS, client_module
+
+scheduler_module = load("scheduler")
+sinks = load("sinks")
+
+
+class CountingSink(sinks.Sink):
+    def __init__(self):
+        self.samples = 0
+
+    async def async_publish(self, sample):
+        self.samples += 1
+
+
+class ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errors = 0
+
+    def emit(self, record):
+        self.errors += 1
+
+
+async def check_disconnect_error(seconds: float = 1.0):
+    """Two packs rotating through one slot while the first two disconnects raise."""
+    adapter = SimulatedAdapter(slots=1)
+    adapter.install()
+    counter = CountingSink()
+    logger = logging.getLogger("bench_scheduler.disconnect")
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    # The second failure is the release after the error from the first
+    failing = [True, True]
+
+    class FailingClient(SimulatedBleakClient):
+        async def disconnect(self):
+            await super().disconnect()
+            if failing:
+                failing.pop()
+                raise client_module.BleakError("Simulated disconnect failure")
+
+    client_module.BleakClient = FailingClient
+    scheduler = scheduler_module.BLEScheduler(max_connections=1, stagger=0.1, logger=logger)
+    clients = []
+    for index in range(2):
+        address = f"AA:BB:CC:DD:FF:{index:02X}"
+        adapter.add(SimulatedBMS(address, seed=index))
+        clients.append(client_module.VestwoodsBMSClient(address, None, logger, 0.5, sinks=[counter]))
+        scheduler.add(clients[-1], 0.1)
+    await asyncio.sleep(seconds)
+    stopped = [task for task in scheduler._tasks.values() if task.done()]
+    for client in clients:
+        await scheduler.remove(client)
+    if failing:
+        raise AssertionError("simulated disconnect failure never happened")
+    if stopped:
+        raise AssertionError(f"{len(stopped)} poll loops ended after a failed disconnect: {stopped[0].exception()!r}")
+    if counter.samples < 4:
+        raise AssertionError(f"only {counter.samples} samples after a failed disconnect")
+
+
+async def run_packs(packs: int, args) -> dict:
+    adapter = SimulatedAdapter(slots=args.slots)
+    adapter.install()
+    counter = CountingSink()
+    errors = ErrorCounter()
+    logger = logging.getLogger(f"bench_scheduler.{packs}")
+    logger.propagate = False
+    logger.setLevel(logging.ERROR)
+    logger.addHandler(errors)
+
+    clients = []
+    for index in range(packs):
+        address = f"AA:BB:CC:DD:{index // 256:02X}:{index % 256:02X}"
+        adapter.add(SimulatedBMS(
+            address, latency=args.latency, connect_latency=args.connect_latency,
+            corruption_rate=args.corruption, seed=index,
+        ))
+        clients.append(client_module.VestwoodsBMSClient(address, None, logger, args.response_timeout, sinks=[counter]))
+
+    scheduler = scheduler_module.BLEScheduler(max_connections=args.max_connections or args.slots, stagger=args.stagger, logger=logger)
+    for client in clients:
+        scheduler.add(client, args.interval)
+    persistent = scheduler.persistent
+    await asyncio.sleep(args.seconds)
+    for client in clients:
+        await scheduler.remove(client)
+
+    return {
+        "packs": packs,
+        "mode": "persistent" if persistent else "rotating",
+        "samples_per_sec": counter.samples / args.seconds,
+        "ideal_per_sec": packs / args.interval,
+        "peak_links": adapter.peak_links,
+        "refused": adapter.refused,
+        "timeouts": sum(client.stats.timeouts for client in clients),
+        "errors": errors.errors,
+    }
+
+
+async def run(args) -> list:
+    client_module.import_ble()
+    await check_disconnect_error()
+    return [await run_packs(packs, args) for packs in args.packs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packs", type=int, nargs="+", default=[1, 2, 4, 8, 12])
+    parser.add_argument("--slots", type=int, default=scheduler_module.DEFAULT_MAX_CONNECTIONS, help="adapter connection slots")
+    parser.add_argument("--max-connections", type=int, default=None, help="scheduler limit, defaults to --slots")
+    parser.add_argument("--seconds", type=float, default=10.0, help="run time per pack count")
+    parser.add_argument("--interval", type=float, default=1.0, help="refresh interval in seconds")
+    parser.add_argument("--stagger", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.05, help="BMS response latency in seconds")
+    parser.add_argument("--connect-latency", type=float, default=0.1, help="connect time in seconds")
+    parser.add_argument("--response-timeout", type=float, default=0.5)
+    parser.add_argument("--corruption", type=float, default=0.0, help="fraction of answers with a flipped bit")
+    args = parser.parse_args()
+
+    try:
+        results = asyncio.run(run(args))
+    except AssertionError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+    columns = list(results[0])
+    print("  ".join(f"{column:>15}" for column in columns))
+    for result in results:
+        print("  ".join(f"{result[column]:>15.2f}" if isinstance(result[column], float) else f"{result[column]:>15}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
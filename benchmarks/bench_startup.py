@@ -0,0 +1,95 @@
+"""Import-time and setup-time benchmark.
+
+Imports each engine module in a fresh interpreter and reports the median
+import time and which heavy dependencies it pulled in. The stdlib modules
+Home Assistant has always loaded (asyncio, json, logging) are imported first
+unless --cold is given. Then starts polling a simulated pack whose connect is
+slow, and reports how long adding it to the scheduler takes against how long
+the first sample takes.
+
+    python benchmarks/bench_startup.py --runs 7 --budget-ms 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+MODULES = ("const", "vestwoods_bms_client", "scheduler", "mqtt_publisher", "history", "dispatch", "frame_log")
+HEAVY = ("bleak", "bleak_retry_connector", "dbus_fast", "numpy", "paho")
+
+IMPORT_PROBE = """
+import sys, time
+sys.path.insert(0, {path!r})
+if {preload!r}:
+    import asyncio, json, logging
+from _engine import load
+start = time.perf_counter()
+load({module!r})
+elapsed = time.perf_counter() - start
+import json
+print(json.dumps({{"seconds": elapsed, "heavy": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def import_time(module: str, runs: int, preload: bool) -> tuple:
+    timings = []
+    heavy = []
+    for _ in range(runs):
+        probe = IMPORT_PROBE.format(path=str(Path(__file__).resolve().parent), module=module, heavy=HEAVY, preload=preload)
+        result = json.loads(subprocess.run([sys.executable, "-c", probe], capture_output=True, check=True, text=True).stdout)
+        timings.append(result["seconds"])
+        heavy = result["heavy"]
+    return statistics.median(timings), heavy
+
+
+async def setup_time(args) -> dict:
+    from _engine import load
+    from simulated_bms import SimulatedAdapter, SimulatedBMS, client_module
+
+    scheduler_module = load("scheduler")
+    sinks = load("sinks")
+    adapter = SimulatedAdapter()
+    adapter.install()
+    bms = adapter.add(SimulatedBMS("AA:BB:CC:DD:EE:01", connect_latency=args.connect_latency))
+    client = client_module.VestwoodsBMSClient(bms.address, None, response_timeout=1.0)
+    first_sample = asyncio.get_running_loop().create_future()
+    client.sinks.append(sinks.CallbackSink(lambda sample: first_sample.done() or first_sample.set_result(sample)))
+    scheduler = scheduler_module.BLEScheduler()
+
+    start = time.perf_counter()
+    scheduler.add(client, 30)
+    setup = time.perf_counter() - start
+    await first_sample
+    sample = time.perf_counter() - start
+    await scheduler.remove(client)
+    return {"setup_ms": setup * 1000, "first_sample_ms": sample * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--cold", action="store_true", help="do not preload asyncio, json and logging")
+    parser.add_argument("--connect-latency", type=float, default=2.0, help="simulated connect time in seconds")
+    parser.add_argument("--budget-ms", type=float, help="exit nonzero if any module imports slower than this")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in MODULES:
+        seconds, heavy = import_time(module, args.runs, not args.cold)
+        print(f"{module:>22}: {seconds * 1000:8.2f} ms  {', '.join(heavy) or '-'}")
+        over_budget |= args.budget_ms is not None and seconds * 1000 > args.budget_ms
+
+    for key, value in asyncio.run(setup_time(args)).items():
+        print(f"{key:>22}: {value:8.2f}")
+
+    if over_budget:
+        print(f"Import time over the {args.budget_ms} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Fuzzes the status frame decoder and the frame reassembler.
+
+Replays the frames in fuzz_corpus.txt, then feeds random CRC-valid frames
+(random bodies, status frames with altered counts, truncated or bit-flipped
+status frames, all resealed with a correct CRC) to decode_sample and
+parse_response, and random streams of frames and noise to FrameReassembler
+in random chunks. Checks that nothing raises, that a frame is either rejected
+(None / {}) or decoded with as many cells and probes as it announces, that
+both decoders agree, and that the reassembler delivers every intact frame of
+a stream. Exits nonzero on the first failure and prints the frame.
+
+    python benchmarks/fuzz_decoder.py --iterations 100000 --seed 1
+"""
+import argparse
+import logging
+import random
+import struct
+import sys
+from pathlib import Path
+
+from simulated_bms import SimulatedBMS, client_module
+
+CORPUS = Path(__file__).resolve().parent / "fuzz_corpus.txt"
+
+
+def seal(body: bytes) -> bytes:
+    """Frames a command and payload with a correct length byte and CRC."""
+    header = bytes([0x00, (len(body) + 3) & 0xff, 0x00])
+    crc = client_module.calc_crc(header + body)
+    return b"\x7a" + header + body + struct.pack(">H", crc) + b"\xa7"
+
+
+def read_corpus(path: Path) -> list:
+    """Returns (name, expect_accept, frame) for every line of a corpus file."""
+    entries = []
+    for line in path.read_text().splitlines():
+        if line.strip() and not line.startswith("#"):
+            name, outcome, frame = line.split()
+            entries.append((name, outcome == "accept", bytes.fromhex(frame)))
+    return entries
+
+
+def check_frame(frame: bytes) -> bool:
+    """Decodes a frame both ways and returns whether it was accepted."""
+    sample = client_module.decode_sample(frame)
+    parsed = client_module.parse_response(bytearray(frame))
+    if sample is None:
+        assert parsed == {}, "parse_response accepted a frame decode_sample rejected"
+        return False
+    assert sample.cell_count == frame[7], "cell count differs from the frame's"
+    assert sample.temperature_count == sample['batteriesTemperatureNumber'], "probe count differs from the frame's"
+    assert sample.as_dict() == parsed, "decode_sample and parse_response disagree"
+    sample.faults, sample.alerts  # Every flag combination must convert
+    return True
+
+
+def mutate(rng: random.Random, frame: bytes) -> bytes:
+    """Returns a malformed variant of a status frame, resealed."""
+    body = bytearray(frame[4:-3])
+    kind = rng.randrange(4)
+    if kind == 0:
+        body = bytearray(b"\x00\x01" + rng.randbytes(rng.randrange(253 - 2)))
+    elif kind == 1:
+        body[3] = rng.randrange(256)
+        if rng.random() < 0.5:
+            temps_at = 2 + 2 + 2 * frame[7] + 18
+            if temps_at < len(body):
+                body[temps_at] = rng.randrange(256)
+    elif kind == 2:
+        del body[rng.randrange(2, len(body) + 1):]
+    else:
+        for _ in range(rng.randrange(1, 4)):
+            body[rng.randrange(2, len(body))] ^= 1 << rng.randrange(8)
+    return seal(bytes(body[:252]))
+
+
+def check_stream(rng: random.Random, frames: list):
+    """Feeds frames and noise in random chunks and checks what comes out."""
+    delivered = []
+    reassembler = client_module.FrameReassembler(delivered.append)
+    stream = bytearray()
+    for frame in frames:
+        if rng.random() < 0.3:
+            stream += rng.randbytes(rng.randrange(1, 40)).replace(b"\x7a", b"\x00")
+        stream += frame
+    position = 0
+    while position < len(stream):
+        size = rng.randrange(1, 64)
+        reassembler.feed(stream[position:position + size])
+        position += size
+    for frame in delivered:
+        assert frame[0] == 0x7a and frame[-1] == 0xa7, "delivered frame without sentinels"
+        assert client_module.calc_crc(frame[1:-3]) == struct.unpack(">H", frame[-3:-1])[0], "delivered frame with a bad CRC"
+    assert delivered == frames, f"delivered {len(delivered)} of {len(frames)} frames"
+
+
+def run(args) -> int:
+    rng = random.Random(args.seed)
+    bms = SimulatedBMS("AA:BB:CC:DD:EE:01", seed=args.seed)
+    corpus = read_corpus(CORPUS)
+
+    for name, accept, frame in corpus:
+        if check_frame(frame) != accept:
+            raise AssertionError(f"corpus frame {name} was not {'accepted' if accept else 'rejected'}")
+
+    accepted = 0
+    for _ in range(args.iterations):
+        frame = mutate(rng, bms.frame())
+        try:
+            accepted += check_frame(frame)
+        except Exception:
+            print(f"frame: {frame.hex()}", file=sys.stderr)
+            raise
+
+    for _ in range(args.streams):
+        frames = [bms.frame() if rng.random() < 0.5 else mutate(rng, bms.frame()) for _ in range(rng.randrange(1, 8))]
+        try:
+            check_stream(rng, frames)
+        except Exception:
+            print(f"frames: {[frame.hex() for frame in frames]}", file=sys.stderr)
+            raise
+
+    print(f"{len(corpus)} corpus frames, {args.iterations} random frames ({accepted} accepted), {args.streams} streams: ok")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Rejected frames are logged at warning level, once per frame
+    logging.disable(logging.WARNING)
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
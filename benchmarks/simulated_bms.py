@@ -0,0 +1,223 @@
+"""Simulated Vestwoods BMS peripheral.
+
+Stands in for BleakScanner, BleakClient and establish_connection so that
+VestwoodsBMSClient can be exercised on a plain Linux box. The simulated pack
+answers the 0x0001 status command with a valid frame, and any command in its
+responses dict with that payload, split into notification chunks, and can
+inject response latency, corrupted bytes and link drops.
+"""
+import asyncio
+import random
+import struct
+
+from _engine import load
+
+client_module = load("vestwoods_bms_client")
+
+
+def build_status_frame(
+    cell_voltages: list,
+    temperatures: list,
+    total_current: float = 0.0,
+    soc: float = 80.0,
+    soh: float = 100.0,
+    nominal_capacity: float = 100.0,
+    cycle_index: int = 12,
+    faults: bytes = bytes(6),
+    status: int = 0,
+) -> bytes:
+    """Encodes a 0x0001 status frame; voltages in V, temperatures in °C."""
+    cells_mv = [round(v * 1000) for v in cell_voltages]
+    max_index = max(range(len(cells_mv)), key=cells_mv.__getitem__)
+    min_index = min(range(len(cells_mv)), key=cells_mv.__getitem__)
+    max_temp = max(temperatures)
+    min_temp = min(temperatures)
+
+    body = bytearray(b"\x00\x01")  # command
+    body += bytes([1, len(cells_mv)])  # onlineStatus, batteriesSeriesNumber
+    body += struct.pack(f">{len(cells_mv)}H", *cells_mv)
+    body += struct.pack(
+        ">BHBHHHHHHHB",
+        max_index + 1, cells_mv[max_index],
+        min_index + 1, cells_mv[min_index],
+        round((total_current + 300) * 100),
+        round(soc * 100),
+        round(soh * 100),
+        round(nominal_capacity * soh),
+        round(nominal_capacity * soc),
+        round(nominal_capacity * 100),
+        len(temperatures),
+    )
+    body += struct.pack(f">{len(temperatures)}H", *(t + 50 for t in temperatures))
+    body += struct.pack(
+        ">HHBBBB",
+        round(sum(temperatures) / len(temperatures)) + 50,
+        max_temp + 52,
+        temperatures.index(max_temp) + 1, max_temp + 50,
+        temperatures.index(min_temp) + 1, min_temp + 50,
+    )
+    body += faults
+    body += struct.pack(">HHB", cycle_index, round(sum(cell_voltages) * 100), status)
+
+    header = bytes([0x00, len(body) + 3, 0x00])
+    crc = client_module.calc_crc(header + body)
+    return b"\x7a" + header + body + struct.pack(">H", crc) + b"\xa7"
+
+
+class SimulatedBMS:
+    """State and link behaviour of one simulated pack."""
+
+    def __init__(
+        self,
+        address: str,
+        cells: int = 16,
+        temperatures: int = 4,
+        chunk_size: int = 20,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        corruption_rate: float = 0.0,
+        disconnect_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.address = address.upper()
+        self.name = f"SIM-{self.address[-5:].replace(':', '')}"
+        self.chunk_size = chunk_size
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.corruption_rate = corruption_rate
+        self.disconnect_rate = disconnect_rate
+        self.random = random.Random(seed)
+        self.cell_voltages = [3.300 + 0.001 * i for i in range(cells)]
+        self.temperatures = [20 + i for i in range(temperatures)]
+        self.total_current = 0.0
+        self.soc = 80.0
+        self.responses = {}  # Command ID -> response payload for commands other than status
+        self.frames_sent = 0
+
+    def step(self):
+        """Random-walks the pack state between polls."""
+        rnd = self.random
+        self.total_current = max(-100.0, min(100.0, self.total_current + rnd.uniform(-2, 2)))
+        self.soc = max(0.0, min(100.0, self.soc + self.total_current / 3600))
+        self.cell_voltages = [max(2.5, min(3.65, v + rnd.choice((-0.001, 0, 0.001)))) for v in self.cell_voltages]
+
+    def frame(self) -> bytes:
+        self.step()
+        self.frames_sent += 1
+        return build_status_frame(
+            self.cell_voltages, self.temperatures, total_current=self.total_current, soc=self.soc
+        )
+
+
+class SimulatedDevice:
+    """Minimal BLEDevice stand-in."""
+
+    def __init__(self, bms: SimulatedBMS):
+        self.address = bms.address
+        self.name = bms.name
+        self.bms = bms
+
+
+class SimulatedBleakClient:
+    """Connection to a SimulatedBMS with the BleakClient calls the client uses."""
+
+    def __init__(self, device: SimulatedDevice, disconnected_callback=None):
+        self.bms = device.bms
+        self._disconnected_callback = disconnected_callback
+        self._notify_callback = None
+        self.is_connected = False
+
+    async def connect(self):
+        await asyncio.sleep(self.bms.connect_latency)
+        self.is_connected = True
+
+    async def disconnect(self):
+        self._drop()
+
+    def _drop(self):
+        if self.is_connected:
+            self.is_connected = False
+            if self._disconnected_callback:
+                self._disconnected_callback(self)
+
+    async def start_notify(self, uuid, callback):
+        self._notify_callback = callback
+
+    async def stop_notify(self, uuid):
+        self._notify_callback = None
+
+    async def write_gatt_char(self, uuid, data, response=False):
+        if not self.is_connected:
+            raise client_module.BleakError("Not connected")
+        bms = self.bms
+        command_id = struct.unpack_from(">H", data, 4)[0]
+        if command_id != 0x0001 and command_id not in bms.responses:
+            return
+
+        loop = asyncio.get_running_loop()
+        if bms.random.random() < bms.disconnect_rate:
+            loop.call_later(bms.latency, self._drop)
+            return
+
+        if command_id == 0x0001:
+            frame = bytearray(bms.frame())
+        else:
+            frame = bytearray(client_module.build_command(command_id, bms.responses[command_id]))
+        if bms.random.random() < bms.corruption_rate:
+            frame[bms.random.randrange(len(frame))] ^= 1 << bms.random.randrange(8)
+        for start in range(0, len(frame), bms.chunk_size):
+            loop.call_later(bms.latency, self._notify, bytes(frame[start:start + bms.chunk_size]))
+
+    def _notify(self, chunk: bytes):
+        if self.is_connected and self._notify_callback is not None:
+            self._notify_callback(None, bytearray(chunk))
+
+
+class SimulatedAdapter:
+    """A Bluetooth adapter that only sees simulated packs.
+
+    With slots set, connecting while that many links are up fails like a real
+    adapter whose connection slots are exhausted.
+    """
+
+    def __init__(self, slots: int | None = None):
+        self.devices = {}
+        self.slots = slots
+        self.connections = 0
+        self.refused = 0
+        self.peak_links = 0
+        self._clients = []
+        self._connecting = 0
+
+    def add(self, bms: SimulatedBMS) -> SimulatedBMS:
+        self.devices[bms.address] = SimulatedDevice(bms)
+        return bms
+
+    async def find_device_by_address(self, address: str, timeout: float = 10.0):
+        return self.devices.get(address.upper())
+
+    @property
+    def links(self) -> int:
+        return sum(client.is_connected for client in self._clients)
+
+    async def establish_connection(self, client_class, device, name, disconnected_callback=None, max_attempts=4, **kwargs):
+        if self.slots is not None and self.links + self._connecting >= self.slots:
+            self.refused += 1
+            raise client_module.BleakError(f"No free connection slot for {device.address}")
+        client = client_class(device, disconnected_callback)
+        self._connecting += 1
+        try:
+            await client.connect()
+        finally:
+            self._connecting -= 1
+        self._clients = [known for known in self._clients if known.is_connected] + [client]
+        self.connections += 1
+        self.peak_links = max(self.peak_links, self.links)
+        return client
+
+    def install(self):
+        """Routes the client module's BLE calls to this adapter."""
+        scanner = type("SimulatedBleakScanner", (), {"find_device_by_address": staticmethod(self.find_device_by_address)})
+        client_module.BleakScanner = scanner
+        client_module.BleakClient = SimulatedBleakClient
+        client_module.establish_connection = self.establish_connection
@@ -1,39 +1,182 @@
 import logging
-import asyncio
-import paho.mqtt.client as mqtt
+import os
+import time
+import voluptuous as vol
+from datetime import timedelta
+from functools import partial
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import Platform
-from homeassistant.helpers.typing import ConfigType
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 
-from .const import DOMAIN, MQTT_TOPIC_PREFIX
+from .bank import DEFAULT_STALE_TIMEOUT, BatteryBank
+from .const import DOMAIN, MQTT_TOPIC_PREFIX, DEFAULT_RESPONSE_TIMEOUT
+from .coordinator import VestwoodsBMSCoordinator
+from .frame_log import FrameLogWriter
+from .history import DEFAULT_HISTORY_SIZE, SampleHistory
+from .mqtt_publisher import DEFAULT_DEADBANDS, PUBLISH_MODE_TOPICS, MqttPublisher
+from .scheduler import DEFAULT_MAX_CONNECTIONS, BLEScheduler
+from .sinks import CallbackSink
 from .vestwoods_bms_client import VestwoodsBMSClient
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR]
 
+SERVICE_PROFILE = "profile"
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional("mac_address"): str,
+    vol.Optional("cycles", default=10): vol.All(int, vol.Range(min=1)),
+})
+
+
+def _sample_signal(entry_id: str) -> str:
+    """Dispatcher signal carrying every sample of a pack entry, for banks."""
+    return f"{DOMAIN}_sample_{entry_id}"
+
+
+def _max_connections(hass: HomeAssistant) -> int:
+    """Returns the smallest connection limit of the loaded packs, which share the adapter."""
+    return min(
+        (data["max_connections"] for data in hass.data[DOMAIN].values() if "bms_client" in data),
+        default=DEFAULT_MAX_CONNECTIONS,
+    )
+
+
+async def _async_profile(hass: HomeAssistant, call: ServiceCall):
+    """Profiles the next polls of one or all packs into <config>/vestwoodsbms/<mac>.prof."""
+    directory = hass.config.path(DOMAIN)
+    await hass.async_add_executor_job(lambda: os.makedirs(directory, exist_ok=True))
+    mac_address = call.data.get("mac_address", "").upper()
+    for data in hass.data[DOMAIN].values():
+        bms_client = data.get("bms_client")
+        if bms_client is None:
+            continue
+        if not mac_address or bms_client.mac_address == mac_address:
+            bms_client.start_profile(
+                call.data["cycles"],
+                os.path.join(directory, f"{bms_client.mac_address.replace(':', '_')}.prof"),
+            )
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Vestwoods BMS from a config entry."""
     hass.data.setdefault(DOMAIN, {})
+    if entry.data.get("bank"):
+        return await _async_setup_bank(hass, entry)
 
     mac_address = entry.data["mac_address"]
     refresh_interval = entry.data["refresh_interval"]
 
+    coordinator = VestwoodsBMSCoordinator(hass, entry)
+
+    sinks = [
+        CallbackSink(coordinator.async_set_updated_data),
+        CallbackSink(lambda sample: async_dispatcher_send(hass, _sample_signal(entry.entry_id), entry.entry_id, sample)),
+    ]
+    if entry.data.get("publish_mqtt", False):
+        cell_deadband = entry.data.get("cell_voltage_deadband", DEFAULT_DEADBANDS["cellVoltage_"])
+        sinks.append(MqttPublisher(
+            hass,
+            f"{MQTT_TOPIC_PREFIX}/{mac_address.replace(':', '_')}",
+            mode=entry.data.get("publish_mode", PUBLISH_MODE_TOPICS),
+            changes_only=entry.data.get("publish_changes_only", False),
+            full_refresh_every=entry.data.get("full_refresh_every", 60),
+            deadbands={**DEFAULT_DEADBANDS, "cellVoltage_": cell_deadband},
+            logger=_LOGGER,
+        ))
+
+    frame_log = None
+    if entry.data.get("capture_frames", False):
+        frame_log = FrameLogWriter(
+            hass.config.path(DOMAIN, f"{mac_address.replace(':', '_')}.log"),
+            max_bytes=entry.data.get("capture_max_mb", 16) * 1024 * 1024,
+        )
+
+    history_size = entry.data.get("history_size", DEFAULT_HISTORY_SIZE)
+    history = SampleHistory(history_size) if history_size > 0 else None
+
     bms_client = VestwoodsBMSClient(
         mac_address=mac_address,
         hass=hass,
-        mqtt_topic_prefix=f"{MQTT_TOPIC_PREFIX}/{mac_address.replace(':', '_')}",
         logger=_LOGGER,
+        response_timeout=entry.data.get("response_timeout", DEFAULT_RESPONSE_TIMEOUT),
+        sinks=sinks,
+        frame_log=frame_log,
+        history=history,
     )
 
-    # Start the BMS client in a background task
+    # All packs share one adapter, the scheduler decides when each one polls.
+    # Polling starts once Home Assistant has started so the first connect,
+    # which may scan for 20 seconds, never holds up boot; the entities stay
+    # unavailable until the first sample arrives.
+    scheduler = hass.data.get(f"{DOMAIN}_scheduler")
+    if scheduler is None:
+        scheduler = hass.data[f"{DOMAIN}_scheduler"] = BLEScheduler(logger=_LOGGER)
+
+        async def async_close_links(event) -> None:
+            await scheduler.close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_close_links)
+
+    @callback
+    def async_start_polling(hass: HomeAssistant) -> None:
+        scheduler.add(
+            bms_client,
+            refresh_interval,
+            min_interval=entry.data.get("min_refresh_interval"),
+            max_interval=entry.data.get("max_refresh_interval"),
+            create_task=partial(entry.async_create_background_task, hass),
+        )
+
+    entry.async_on_unload(async_at_started(hass, async_start_polling))
+
     hass.data[DOMAIN][entry.entry_id] = {
         "bms_client": bms_client,
-        "task": hass.async_create_task(bms_client.run(refresh_interval)),
+        "coordinator": coordinator,
+        "max_connections": entry.data.get("max_connections", DEFAULT_MAX_CONNECTIONS),
     }
+    await scheduler.set_max_connections(_max_connections(hass))
+
+    if not hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        async def async_handle_profile(call: ServiceCall):
+            await _async_profile(hass, call)
+
+        hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_handle_profile, schema=PROFILE_SCHEMA)
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    return True
+
+
+async def _async_setup_bank(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up a bank aggregating the samples of its pack entries.
+
+    The bank is updated once per pack sample, in whatever order the packs'
+    entries are set up; packs that stop reporting drop out after the stale
+    timeout.
+    """
+    bank = BatteryBank(entry.data["name"], entry.data.get("stale_timeout", DEFAULT_STALE_TIMEOUT))
+
+    @callback
+    def async_handle_sample(pack_id: str, sample) -> None:
+        bank.update(pack_id, sample, time.monotonic())
+
+    for pack_id in entry.data["packs"]:
+        entry.async_on_unload(async_dispatcher_connect(hass, _sample_signal(pack_id), async_handle_sample))
+
+    @callback
+    def async_expire(now) -> None:
+        bank.expire(time.monotonic())
+
+    entry.async_on_unload(
+        async_track_time_interval(hass, async_expire, timedelta(seconds=max(bank.stale_after / 4, 5)))
+    )
+
+    hass.data[DOMAIN][entry.entry_id] = {"bank": bank}
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -45,12 +188,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         data = hass.data[DOMAIN].pop(entry.entry_id)
-        bms_client_task = data["task"]
-
-        bms_client_task.cancel()
-        try:
-            await bms_client_task  # Wait for the task to finish cancelling
-        except asyncio.CancelledError:
-            _LOGGER.info("BMS client task cancelled successfully.")
+        if "bms_client" in data:
+            bms_client = data["bms_client"]
+            scheduler = hass.data[f"{DOMAIN}_scheduler"]
+            await scheduler.remove(bms_client)
+            await scheduler.set_max_connections(_max_connections(hass))
+            if bms_client.frame_log is not None:
+                await bms_client.frame_log.async_flush()
+            _LOGGER.info("BMS client stopped successfully.")
+        if hass.services.has_service(DOMAIN, SERVICE_PROFILE) and not any(
+            "bms_client" in data for data in hass.data[DOMAIN].values()
+        ):
+            hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
 
     return unload_ok
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Battery bank: running aggregates over packs connected in parallel."""
+from .dispatch import KeyDispatcher
+
+DEFAULT_STALE_TIMEOUT = 300
+SUMMARY_KEYS = (
+    'packCount', 'soc', 'totalCurrent', 'totalPower', 'surplusCapacity', 'nominalCapacity',
+    'maxCellVoltage', 'minCellVoltage', 'cellSpread',
+)
+
+
+class _Pack:
+    __slots__ = ('nominal', 'stored', 'surplus', 'current', 'power', 'max_cell', 'min_cell', 'updated')
+
+    def __init__(self, sample, now: float):
+        self.nominal = sample.nominal_capacity
+        self.stored = sample.soc * self.nominal
+        self.surplus = sample.surplus_capacity
+        self.current = sample.total_current
+        self.power = sample.total_voltage * sample.total_current
+        self.max_cell = sample.max_cell_voltage
+        self.min_cell = sample.min_cell_voltage
+        self.updated = now
+
+    def as_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class BatteryBank:
+    """Capacity-weighted SOC, summed current and power, remaining Ah and
+    bank-wide cell extremes over the packs of a bank.
+
+    update() swaps one pack's contribution out of the running sums and the new
+    one in, so a pack sample costs the same however many packs the bank has;
+    only the cell extremes are taken over the packs. Packs not heard from for
+    stale_after seconds are dropped by expire(). Listeners added through
+    async_add_key_listener are called per summary key, when its value changes.
+    """
+
+    def __init__(self, name: str, stale_after: float = DEFAULT_STALE_TIMEOUT):
+        self.name = name
+        self.stale_after = stale_after
+        self.packs = {}
+        self._dispatcher = KeyDispatcher()
+        self._reset_sums()
+        self.summary = self._summarize()
+
+    def _reset_sums(self):
+        self._nominal = 0.0
+        self._stored = 0.0
+        self._surplus = 0.0
+        self._current = 0.0
+        self._power = 0.0
+
+    def _add(self, pack: _Pack, sign: int):
+        self._nominal += sign * pack.nominal
+        self._stored += sign * pack.stored
+        self._surplus += sign * pack.surplus
+        self._current += sign * pack.current
+        self._power += sign * pack.power
+
+    def update(self, pack_id: str, sample, now: float) -> dict:
+        """Takes a pack's new sample and returns the new bank summary."""
+        old = self.packs.get(pack_id)
+        if old is not None:
+            self._add(old, -1)
+        pack = self.packs[pack_id] = _Pack(sample, now)
+        self._add(pack, 1)
+        return self._publish()
+
+    def expire(self, now: float) -> dict:
+        """Drops the packs not updated within stale_after seconds and returns the summary."""
+        stale = [pack_id for pack_id, pack in self.packs.items() if now - pack.updated > self.stale_after]
+        for pack_id in stale:
+            del self.packs[pack_id]
+        # Rebuilding the sums now and then also stops float drift from piling up
+        self._reset_sums()
+        for pack in self.packs.values():
+            self._add(pack, 1)
+        return self._publish()
+
+    def _publish(self) -> dict:
+        self.summary = self._summarize()
+        self._dispatcher.dispatch(self.summary)
+        return self.summary
+
+    def _summarize(self) -> dict:
+        if not self.packs:
+            return {**dict.fromkeys(SUMMARY_KEYS), 'packCount': 0}
+        max_cell = max(pack.max_cell for pack in self.packs.values())
+        min_cell = min(pack.min_cell for pack in self.packs.values())
+        return {
+            'packCount': len(self.packs),
+            'soc': round(self._stored / self._nominal, 1) if self._nominal > 0 else None,
+            'totalCurrent': round(self._current, 2),
+            'totalPower': round(self._power, 1),
+            'surplusCapacity': round(self._surplus, 2),
+            'nominalCapacity': round(self._nominal, 2),
+            'maxCellVoltage': max_cell,
+            'minCellVoltage': min_cell,
+            'cellSpread': round(max_cell - min_cell, 3),
+        }
+
+    def async_add_key_listener(self, key: str, getter, update_callback):
+        """Calls update_callback(value) whenever getter(summary) changes. Returns a remover."""
+        return self._dispatcher.add_listener(key, getter, update_callback)
@@ -2,8 +2,13 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.core import callback
+import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN
+from .bank import DEFAULT_STALE_TIMEOUT
+from .const import DOMAIN, DEFAULT_RESPONSE_TIMEOUT
+from .history import DEFAULT_HISTORY_SIZE
+from .mqtt_publisher import DEFAULT_DEADBANDS, PUBLISH_MODE_TOPICS, PUBLISH_MODES
+from .scheduler import DEFAULT_MAX_CONNECTIONS
 
 class VestwoodsBMSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Vestwoods BMS."""
@@ -11,18 +16,63 @@ class VestwoodsBMSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
     async def async_step_user(self, user_input=None):
-        """Handle the initial step."""
+        """Handle the initial step: add a pack or a bank of packs."""
+        return self.async_show_menu(step_id="user", menu_options=["pack", "bank"])
+
+    async def async_step_pack(self, user_input=None):
+        """Handle adding a pack."""
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title=user_input["mac_address"], data=user_input)
+            if user_input["min_refresh_interval"] > user_input["max_refresh_interval"]:
+                errors["min_refresh_interval"] = "min_above_max"
+            else:
+                return self.async_create_entry(title=user_input["mac_address"], data=user_input)
 
         data_schema = vol.Schema({
             vol.Required("mac_address"): str,
-            vol.Required("refresh_interval", default=30): int,
-            vol.Optional("number_of_cells", default=16): int,
-            vol.Optional("number_of_temperature_sensors", default=4): int,
+            vol.Required("refresh_interval", default=30): vol.All(int, vol.Range(min=1)),
+            vol.Optional("min_refresh_interval", default=5): vol.All(int, vol.Range(min=1)),
+            vol.Optional("max_refresh_interval", default=300): vol.All(int, vol.Range(min=1)),
+            vol.Optional("response_timeout", default=DEFAULT_RESPONSE_TIMEOUT): vol.All(
+                vol.Coerce(float), vol.Range(min=0, min_included=False)
+            ),
+            vol.Optional("max_connections", default=DEFAULT_MAX_CONNECTIONS): vol.All(int, vol.Range(min=1)),
+            vol.Optional("publish_mqtt", default=False): bool,
+            vol.Optional("publish_mode", default=PUBLISH_MODE_TOPICS): vol.In(PUBLISH_MODES),
+            vol.Optional("publish_changes_only", default=False): bool,
+            vol.Optional("cell_voltage_deadband", default=DEFAULT_DEADBANDS["cellVoltage_"]): vol.Coerce(float),
+            vol.Optional("full_refresh_every", default=60): int,
+            vol.Optional("capture_frames", default=False): bool,
+            vol.Optional("capture_max_mb", default=16): int,
+            vol.Optional("history_size", default=DEFAULT_HISTORY_SIZE): int,
+        })
+
+        return self.async_show_form(
+            step_id="pack",
+            data_schema=data_schema,
+            errors=errors
+        )
+
+    async def async_step_bank(self, user_input=None):
+        """Handle adding a bank that aggregates packs connected in parallel."""
+        packs = {
+            entry.entry_id: entry.title
+            for entry in self._async_current_entries()
+            if not entry.data.get("bank")
+        }
+        if not packs:
+            return self.async_abort(reason="no_packs")
+
+        if user_input is not None:
+            return self.async_create_entry(title=user_input["name"], data={**user_input, "bank": True})
+
+        data_schema = vol.Schema({
+            vol.Required("name", default="Battery Bank"): str,
+            vol.Required("packs"): cv.multi_select(packs),
+            vol.Optional("stale_timeout", default=DEFAULT_STALE_TIMEOUT): int,
         })
 
         return self.async_show_form(
-            step_id="user",
+            step_id="bank",
             data_schema=data_schema
         )
@@ -1,2 +1,4 @@
 DOMAIN = "vestwoodsbms"
 MQTT_TOPIC_PREFIX = "vestwoodsbms"
+
+DEFAULT_RESPONSE_TIMEOUT = 2.0
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DOMAIN
+from .dispatch import KeyDispatcher
+from .vestwoods_bms_client import BmsSample
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class VestwoodsBMSCoordinator(DataUpdateCoordinator[BmsSample]):
+    """Holds the latest BmsSample for the entities of one pack.
+
+    The BMS client pushes every decoded frame with async_set_updated_data;
+    the coordinator never polls on its own. Entities listen per key and are
+    only called when their value changed.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {config_entry.data['mac_address']}",
+        )
+        self.dispatcher = KeyDispatcher()
+
+    @callback
+    def async_add_key_listener(self, key: str, getter, update_callback):
+        """Calls update_callback(value) whenever getter(sample) changes. Returns a remover."""
+        return self.dispatcher.add_listener(key, getter, update_callback)
+
+    @callback
+    def async_set_updated_data(self, data: BmsSample) -> None:
+        super().async_set_updated_data(data)
+        self.dispatcher.dispatch(data)
@@ -0,0 +1,139 @@
+"""Headless daemon: polls Vestwoods packs and publishes to MQTT without Home Assistant.
+
+Runs the same engine as the integration (VestwoodsBMSClient, BLEScheduler and
+MqttPublisher) with a paho-mqtt client as transport, or writes JSON lines to
+stdout without a broker. Needs bleak, bleak-retry-connector and, for MQTT,
+paho-mqtt; uses uvloop when asked to and installed.
+
+    python vestwoodsbms_daemon.py AA:BB:CC:DD:EE:01 AA:BB:CC:DD:EE:02 --broker localhost
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from .const import DEFAULT_RESPONSE_TIMEOUT, MQTT_TOPIC_PREFIX
+from .mqtt_publisher import DEFAULT_DEADBANDS, PUBLISH_MODE_TOPICS, PUBLISH_MODES, MqttPublisher
+from .scheduler import DEFAULT_MAX_CONNECTIONS, BLEScheduler
+from .sinks import JsonLinesSink
+from .vestwoods_bms_client import VestwoodsBMSClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PahoMqttPublisher(MqttPublisher):
+    """MqttPublisher that sends through a paho-mqtt client.
+
+    paho's publish() only queues the message; its network thread does the I/O.
+    """
+
+    def __init__(self, mqtt_client, topic_prefix: str, **kwargs):
+        super().__init__(None, topic_prefix, **kwargs)
+        self._mqtt_client = mqtt_client
+
+    async def _send(self, topic: str, payload: str):
+        self._mqtt_client.publish(topic, payload, qos=0, retain=False)
+
+
+def connect_mqtt(host: str, port: int, username: str | None, password: str | None):
+    """Returns a paho-mqtt client connected to the broker, with its network loop running."""
+    import paho.mqtt.client as mqtt
+
+    if hasattr(mqtt, "CallbackAPIVersion"):  # paho-mqtt 2.x
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    else:
+        client = mqtt.Client()
+    if username:
+        client.username_pw_set(username, password)
+    client.connect_async(host, port)
+    client.loop_start()
+    return client
+
+
+def create_clients(mac_addresses, args, mqtt_client=None) -> list:
+    """Builds one VestwoodsBMSClient per pack with its sink."""
+    clients = []
+    for mac_address in mac_addresses:
+        if mqtt_client is not None:
+            sink = PahoMqttPublisher(
+                mqtt_client,
+                f"{args.topic_prefix}/{mac_address.upper().replace(':', '_')}",
+                mode=args.mode,
+                changes_only=args.changes_only,
+                full_refresh_every=args.full_refresh_every,
+                deadbands={**DEFAULT_DEADBANDS, "cellVoltage_": args.cell_voltage_deadband},
+                logger=_LOGGER,
+            )
+        else:
+            sink = JsonLinesSink(mac_address.upper())
+        clients.append(VestwoodsBMSClient(mac_address, None, _LOGGER, args.response_timeout, sinks=[sink]))
+    return clients
+
+
+async def run(clients, args, stop: asyncio.Event):
+    """Polls clients until stop is set, then closes their connections."""
+    scheduler = BLEScheduler(max_connections=args.max_connections, logger=_LOGGER)
+    for client in clients:
+        scheduler.add(client, args.refresh_interval, min_interval=args.min_refresh_interval, max_interval=args.max_refresh_interval)
+    await stop.wait()
+    await scheduler.close()
+
+
+async def async_main(args):
+    mqtt_client = connect_mqtt(args.broker, args.port, args.username, args.password) if args.broker else None
+    clients = create_clients(args.mac_addresses, args, mqtt_client)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await run(clients, args, stop)
+    finally:
+        if mqtt_client is not None:
+            mqtt_client.loop_stop()
+            mqtt_client.disconnect()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mac_addresses", nargs="+", metavar="MAC", help="Bluetooth address of a pack")
+    parser.add_argument("--broker", help="MQTT broker host; without it samples are printed as JSON lines")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--topic-prefix", default=MQTT_TOPIC_PREFIX)
+    parser.add_argument("--mode", choices=PUBLISH_MODES, default=PUBLISH_MODE_TOPICS)
+    parser.add_argument("--changes-only", action="store_true")
+    parser.add_argument("--cell-voltage-deadband", type=float, default=DEFAULT_DEADBANDS["cellVoltage_"])
+    parser.add_argument("--full-refresh-every", type=int, default=60)
+    parser.add_argument("--refresh-interval", type=int, default=30)
+    parser.add_argument("--min-refresh-interval", type=int, default=5)
+    parser.add_argument("--max-refresh-interval", type=int, default=300)
+    parser.add_argument("--response-timeout", type=float, default=DEFAULT_RESPONSE_TIMEOUT)
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS)
+    parser.add_argument("--uvloop", action="store_true", help="run on uvloop if it is installed")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    if min(args.refresh_interval, args.min_refresh_interval, args.max_refresh_interval) < 1:
+        parser.error("refresh intervals must be at least 1 second")
+    if args.min_refresh_interval > args.max_refresh_interval:
+        parser.error("--min-refresh-interval is above --max-refresh-interval")
+    if args.response_timeout <= 0:
+        parser.error("--response-timeout must be above 0")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(message)s")
+
+    runner = asyncio.run
+    if args.uvloop:
+        try:
+            import uvloop
+
+            runner = uvloop.run
+        except ImportError:
+            _LOGGER.warning("uvloop is not installed, using the default event loop")
+    runner(async_main(args))
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"mac_address"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return poll timings, link counters and the last sample of a pack, or a bank's packs and summary."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    if "bank" in data:
+        bank = data["bank"]
+        return {
+            "entry": dict(entry.data),
+            "packs": {pack_id: pack.as_dict() for pack_id, pack in bank.packs.items()},
+            "summary": bank.summary,
+        }
+
+    bms_client = data["bms_client"]
+    history = bms_client.history
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "client": bms_client.diagnostics(),
+        "last_sample": bms_client.last_sample.as_dict() if bms_client.last_sample is not None else None,
+        "history": {
+            "capacity": history.capacity,
+            "samples": len(history),
+            "windows": {window: history.summary(window) for window in history.windows},
+        } if history is not None else None,
+    }
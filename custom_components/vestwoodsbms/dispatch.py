@@ -0,0 +1,65 @@
+"""Per-key dispatch of samples to the entities that show them."""
+_MISSING = object()
+
+
+class KeyDispatcher:
+    """Routes every new sample to the listeners of the keys whose value changed.
+
+    Each key is registered once with a getter that reads its value from a
+    sample; listeners are looked up by key, so a sample costs one getter call
+    per key and one listener call per changed value, however many packs and
+    entities there are.
+    """
+
+    def __init__(self):
+        self._getters = {}
+        self._listeners = {}
+        self._values = {}
+        self.sample = None
+
+    def add_listener(self, key: str, getter, listener):
+        """Calls listener(value) whenever the value of key changes.
+
+        The listener is called right away if a sample has already been seen.
+        Returns a function that removes the listener.
+        """
+        self._getters.setdefault(key, getter)
+        self._listeners.setdefault(key, []).append(listener)
+        if self.sample is not None:
+            value = self._values.get(key, _MISSING)
+            if value is _MISSING:
+                value = self._values[key] = self._getters[key](self.sample)
+            listener(value)
+
+        def remove():
+            listeners = self._listeners[key]
+            listeners.remove(listener)
+            if not listeners:
+                del self._listeners[key]
+                del self._getters[key]
+                self._values.pop(key, None)
+
+        return remove
+
+    def dispatch(self, sample) -> int:
+        """Hands a sample to the listeners of changed keys, returns how many were called.
+
+        Listeners may add and remove listeners while being called: the keys
+        and listeners are snapshotted, a key added meanwhile gets its value
+        right away from add_listener and a removed one is skipped.
+        """
+        self.sample = sample
+        values = self._values
+        listeners = self._listeners
+        calls = 0
+        for key, getter in tuple(self._getters.items()):
+            if key not in listeners:
+                continue
+            value = getter(sample)
+            if values.get(key, _MISSING) == value:
+                continue
+            values[key] = value
+            for listener in tuple(listeners[key]):
+                listener(value)
+                calls += 1
+        return calls
@@ -0,0 +1,273 @@
+"""Append-only capture log of raw BMS frames and a batch decoder for it.
+
+A log file starts with MAGIC followed by records of a little-endian float64
+UNIX timestamp, a uint16 frame length and the raw, CRC-valid frame bytes.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+
+from .vestwoods_bms_client import (
+    LINEAR_SCALES,
+    STATUS_COMMAND,
+    STATUS_HEAD_FIELDS,
+    STATUS_MID_FIELDS,
+    STATUS_TAIL_FIELDS,
+    frame_command,
+    status_layout,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"VWBMSLG1"
+RECORD_HEADER = struct.Struct("<dH")
+
+
+class FrameLogWriter:
+    """Appends frames to a size-rotated capture log.
+
+    append() only buffers the record; async_flush() writes the buffer from an
+    executor thread so the event loop never blocks on disk I/O. When the file
+    would grow past max_bytes it is rotated to path.1, path.1 to path.2 and so
+    on, keeping backup_count old files. Records that cannot be written are
+    dropped with a warning rather than failing the poll that flushed them.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16 * 1024 * 1024, backup_count: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped_bytes = 0
+        self._pending = bytearray()
+        self._lock = asyncio.Lock()
+        self._failing = False
+
+    def append(self, frame: bytes, timestamp: float | None = None):
+        self._pending += RECORD_HEADER.pack(time.time() if timestamp is None else timestamp, len(frame))
+        self._pending += frame
+
+    async def async_flush(self):
+        if not self._pending:
+            return
+        async with self._lock:
+            data, self._pending = self._pending, bytearray()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.write, data)
+            except OSError as e:
+                self.dropped_bytes += len(data)
+                # Warn once per outage, a full disk would otherwise warn on every poll
+                if not self._failing:
+                    _LOGGER.warning(f"Failed to write frame log {self.path}, dropping frames until it works again: {e}")
+                    self._failing = True
+                return
+            if self._failing:
+                _LOGGER.info(f"Writing frame log {self.path} again, {self.dropped_bytes} bytes dropped so far")
+                self._failing = False
+
+    def write(self, data: bytes):
+        """Writes records to the log, rotating first if needed. Blocking."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+            size = 0
+        with open(self.path, "ab") as log:
+            if not size:
+                log.write(MAGIC)
+            log.write(data)
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def iter_records(path: str):
+    """Yields (timestamp, frame bytes) for every record of a log."""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as log, mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a frame log")
+        offset = len(MAGIC)
+        end = len(mapped) - RECORD_HEADER.size
+        while offset <= end:
+            timestamp, length = RECORD_HEADER.unpack_from(mapped, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > len(mapped):
+                _LOGGER.warning(f"Truncated record at the end of {path}")
+                break
+            yield timestamp, mapped[offset:offset + length]
+            offset += length
+
+
+def _columns_for(cells: int, temps: int) -> list:
+    """Returns (column, struct format, mask, divisor, offset) for every field of a status frame layout.
+
+    A column value is (raw & mask) / divisor - offset; columns named with a
+    leading underscore are framing bytes rather than data.
+    """
+    header = [("_start", "B", None), ("_b1", "B", None), ("_length", "B", None), ("_b3", "B", None), ("_command", "H", None)]
+    cell_columns = [(f"cellVoltage_{i+1}", "H", "cell") for i in range(cells)]
+    temp_columns = [(f"cellTemperature_{i+1}", "H", "temp") for i in range(temps)]
+    fields = (
+        header
+        + list(STATUS_HEAD_FIELDS) + cell_columns
+        + list(STATUS_MID_FIELDS) + temp_columns
+        + list(STATUS_TAIL_FIELDS)
+        + [("_crc", "H", None), ("_end", "B", None)]
+    )
+    columns = []
+    for key, fmt, conv in fields:
+        if conv == "cell":
+            columns.append((key, fmt, 0x7fff, 1000.0, 0.0))
+        elif conv == "temp":
+            columns.append((key, fmt, None, 1.0, 50.0))
+        else:
+            # Fault, alert and status bytes stay integers rather than hex strings
+            columns.append((key, fmt, None, *LINEAR_SCALES.get(conv, (1.0, 0.0))))
+    return columns
+
+
+def _status_layout(frame) -> tuple | None:
+    """Returns the layout of a logged status frame, None for other commands and malformed frames."""
+    if len(frame) < 8 or frame_command(frame) != STATUS_COMMAND.command_id:
+        return None
+    return status_layout(frame)
+
+
+def read_columns(path: str) -> dict:
+    """Decodes every status frame of a log into one float64 array per field.
+
+    Returns a dict with a "timestamp" column plus one column per decoded field,
+    with per-cell fields named cellVoltage_N / cellTemperature_N, in log
+    order. Values are scaled like parse_response but not rounded. Frames of
+    other commands are skipped. Columns are NumPy arrays when NumPy is
+    installed and array('d') otherwise. Cells and probes a frame does not
+    have are NaN.
+    """
+    # NumPy is only needed offline, so it is not imported with the integration
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is not None:
+        columns = _read_columns_numpy(path, np)
+        if columns is not None:
+            return columns
+
+    layouts = {}
+    for position, (timestamp, frame) in enumerate(iter_records(path)):
+        layout = _status_layout(frame)
+        if layout is None:
+            continue
+        decoder = layouts.get(layout)
+        if decoder is None:
+            columns = _columns_for(*layout)
+            decoder = layouts[layout] = (struct.Struct(">" + "".join(column[1] for column in columns)), columns, [], [], [])
+        frame_struct, _, rows, timestamps, positions = decoder
+        if len(frame) != frame_struct.size:
+            continue
+        rows.append(frame_struct.unpack(frame))
+        timestamps.append(timestamp)
+        positions.append(position)
+
+    # Rows are grouped by layout below and put back in log order at the end
+    nan = array("d", [float("nan")])
+    result = {"timestamp": array("d")}
+    order = []
+    count = 0
+    for _, columns, rows, timestamps, positions in layouts.values():
+        result["timestamp"].extend(timestamps)
+        order.extend(positions)
+        for (key, _, mask, divisor, offset), raw in zip(columns, zip(*rows)):
+            if key.startswith("_"):
+                continue
+            column = result.get(key)
+            if column is None:
+                column = result[key] = nan * count
+            if mask is not None:
+                column.extend([(value & mask) / divisor for value in raw])
+            elif divisor != 1.0 or offset:
+                column.extend([value / divisor - offset for value in raw])
+            else:
+                column.extend(raw)
+        count += len(rows)
+        for column in result.values():
+            if len(column) < count:
+                column.extend(nan * (count - len(column)))
+
+    if len(layouts) > 1:
+        order = sorted(range(count), key=order.__getitem__)
+        result = {key: array("d", [column[index] for index in order]) for key, column in result.items()}
+    if np is not None:
+        return {key: np.frombuffer(column, dtype=np.float64) for key, column in result.items()}
+    return result
+
+
+def _read_columns_numpy(path: str, np) -> dict | None:
+    """Vectorized decode of a log whose records all share one frame layout.
+
+    Such a log is a fixed-stride table, so it is memory-mapped through a
+    structured dtype. Returns None when the log is empty, has mixed layouts
+    or holds frames of other commands.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return None
+    with open(path, "rb") as log:
+        head = log.read(len(MAGIC) + RECORD_HEADER.size + 256)
+    if head[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a frame log")
+    if len(head) < len(MAGIC) + RECORD_HEADER.size:
+        return None
+    length = RECORD_HEADER.unpack_from(head, len(MAGIC))[1]
+    frame = head[len(MAGIC) + RECORD_HEADER.size:][:length]
+    stride = RECORD_HEADER.size + length
+    if length < 8 or len(frame) != length or (size - len(MAGIC)) % stride:
+        return None
+
+    layout = _status_layout(frame)
+    if layout is None:
+        return None
+    columns = _columns_for(*layout)
+    dtype = np.dtype({
+        "names": ["timestamp", "_record_length"] + [column[0] for column in columns],
+        "formats": ["<f8", "<u2"] + [">u2" if column[1] == "H" else "u1" for column in columns],
+    })
+    if dtype.itemsize != stride:
+        return None
+
+    table = np.memmap(path, dtype=dtype, mode="r", offset=len(MAGIC))
+    if not (
+        np.all(table["_record_length"] == length)
+        and np.all(table["_start"] == 0x7a)
+        and np.all(table["_end"] == 0xa7)
+        and np.all(table["_command"] == STATUS_COMMAND.command_id)
+        and np.all(table["batteriesSeriesNumber"] == layout[0])
+        and np.all(table["batteriesTemperatureNumber"] == layout[1])
+    ):
+        return None
+
+    result = {"timestamp": np.array(table["timestamp"])}
+    for key, _, mask, divisor, offset in columns:
+        if key.startswith("_"):
+            continue
+        raw = table[key]
+        if mask is not None:
+            raw = raw & mask
+        result[key] = raw / divisor - offset
+    return result
@@ -0,0 +1,150 @@
+"""In-memory rolling history of one pack with windowed statistics."""
+from array import array
+from collections import deque
+
+DEFAULT_HISTORY_SIZE = 3600
+DEFAULT_WINDOWS = (60, 900, 3600)
+
+
+class _Window:
+    """Running aggregates over the samples of the last `seconds` seconds.
+
+    start is the sequence number of the oldest sample in the window; the
+    deques hold sequence numbers whose currents are increasing (min_queue) or
+    decreasing (max_queue), so their heads are the window minimum and maximum.
+    """
+
+    __slots__ = ('seconds', 'start', 'current_sum', 'min_queue', 'max_queue')
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.start = 0
+        self.current_sum = 0
+        self.min_queue = deque()
+        self.max_queue = deque()
+
+
+class SampleHistory:
+    """Fixed-size, array-backed ring buffer of recent BmsSamples.
+
+    Stores each sample's timestamp, raw total current, raw cell spread (mV) and
+    raw cell voltages in preallocated arrays of `capacity` slots. Min, max and
+    sum of the current are updated incrementally per window, in amortized O(1)
+    per sample. Windows longer than the buffer cover the whole buffer.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_SIZE, windows=DEFAULT_WINDOWS):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.currents = array('H', bytes(2 * capacity))
+        self.spreads = array('H', bytes(2 * capacity))
+        self.cells = array('H')
+        self.cell_count = 0
+        self.total = 0
+        self._windows = {seconds: _Window(seconds) for seconds in windows}
+        self._summaries = {}
+
+    @property
+    def windows(self):
+        return tuple(self._windows)
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def clear(self):
+        self.total = 0
+        self._summaries.clear()
+        for seconds in self._windows:
+            self._windows[seconds] = _Window(seconds)
+
+    def append(self, sample, timestamp: float):
+        """Adds a sample taken at a monotonic timestamp in seconds."""
+        if sample.cell_count != self.cell_count:
+            self.clear()
+            self.cell_count = sample.cell_count
+            self.cells = array('H', bytes(2 * self.capacity * self.cell_count))
+
+        capacity = self.capacity
+        currents = self.currents
+        timestamps = self.timestamps
+        seq = self.total
+        if seq >= capacity:
+            # The slot about to be reused must leave every window first
+            for window in self._windows.values():
+                if window.start == seq - capacity:
+                    self._evict(window)
+
+        slot = seq % capacity
+        current = sample.total_current_raw
+        timestamps[slot] = timestamp
+        currents[slot] = current
+        self.spreads[slot] = (sample.max_cell_voltage_raw - sample.min_cell_voltage_raw) & 0xffff
+        count = self.cell_count
+        self.cells[slot * count:(slot + 1) * count] = sample.cell_voltages_raw
+        self.total = seq + 1
+        self._summaries.clear()
+
+        for window in self._windows.values():
+            window.current_sum += current
+            min_queue = window.min_queue
+            while min_queue and currents[min_queue[-1] % capacity] >= current:
+                min_queue.pop()
+            min_queue.append(seq)
+            max_queue = window.max_queue
+            while max_queue and currents[max_queue[-1] % capacity] <= current:
+                max_queue.pop()
+            max_queue.append(seq)
+
+            horizon = timestamp - window.seconds
+            while timestamps[window.start % capacity] < horizon:
+                self._evict(window)
+
+    def _evict(self, window: _Window):
+        start = window.start
+        window.current_sum -= self.currents[start % self.capacity]
+        if window.min_queue[0] == start:
+            window.min_queue.popleft()
+        if window.max_queue[0] == start:
+            window.max_queue.popleft()
+        window.start = start + 1
+
+    def summary(self, seconds: float) -> dict | None:
+        """Returns the statistics of one window, or None before the first sample.
+
+        Currents are in A, imbalance_trend is the change of the cell spread
+        across the window in V and cell_dvdt the per-cell voltage change rate
+        in mV/min (empty until the window spans some time).
+        """
+        if not self.total:
+            return None
+        summary = self._summaries.get(seconds)
+        if summary is not None:
+            return summary
+
+        window = self._windows[seconds]
+        capacity = self.capacity
+        first = window.start % capacity
+        last = (self.total - 1) % capacity
+        samples = self.total - window.start
+        span = self.timestamps[last] - self.timestamps[first]
+
+        cell_dvdt = []
+        if span > 0:
+            count = self.cell_count
+            cells = self.cells
+            per_minute = 60.0 / span
+            cell_dvdt = [
+                round(((cells[last * count + i] & 0x7fff) - (cells[first * count + i] & 0x7fff)) * per_minute, 3)
+                for i in range(count)
+            ]
+
+        summary = self._summaries[seconds] = {
+            'samples': samples,
+            'span': span,
+            'current_min': round(self.currents[window.min_queue[0] % capacity] / 100.0 - 300.0, 2),
+            'current_max': round(self.currents[window.max_queue[0] % capacity] / 100.0 - 300.0, 2),
+            'current_mean': round(window.current_sum / samples / 100.0 - 300.0, 2),
+            'imbalance_trend': round((self.spreads[last] - self.spreads[first]) / 1000.0, 3),
+            'cell_dvdt': cell_dvdt,
+        }
+        return summary
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+
+from .sinks import Sink
+
+_LOGGER = logging.getLogger(__name__)
+
+PUBLISH_MODE_TOPICS = "topics"  # One topic per field
+PUBLISH_MODE_JSON = "json"  # One JSON document per sample on <prefix>/state
+PUBLISH_MODES = [PUBLISH_MODE_TOPICS, PUBLISH_MODE_JSON]
+
+# Smallest change worth publishing in change-only mode, by field or field prefix.
+# Fields not listed are published on any change.
+DEFAULT_DEADBANDS = {
+    "cellVoltage_": 0.002,
+    "maxCellVoltage": 0.002,
+    "minCellVoltage": 0.002,
+    "totalVoltage": 0.02,
+    "totalCurrent": 0.1,
+}
+
+
+def flatten(parsed_data: dict):
+    """Yields (field, value) pairs, with one field per cell voltage and temperature."""
+    for key, value in parsed_data.items():
+        if key == 'cellVoltages':
+            for i, voltage in enumerate(value):
+                yield f"cellVoltage_{i+1}", voltage
+        elif key == 'cellTemperatures':
+            for i, temp in enumerate(value):
+                yield f"cellTemperature_{i+1}", temp
+        else:
+            yield key, value
+
+
+class MqttPublisher(Sink):
+    """Publishes decoded BMS data to the Home Assistant MQTT broker.
+
+    Other transports override _send. In change-only mode a field is only published once it moved by at least its
+    deadband since it was last published; every full_refresh_every samples all
+    fields are published regardless.
+    """
+
+    def __init__(
+        self,
+        hass,
+        topic_prefix: str,
+        mode: str = PUBLISH_MODE_TOPICS,
+        changes_only: bool = False,
+        full_refresh_every: int = 60,
+        deadbands: dict = DEFAULT_DEADBANDS,
+        logger: logging.Logger = _LOGGER,
+    ):
+        if mode not in PUBLISH_MODES:
+            raise ValueError(f"Unknown publish mode: {mode}")
+        self.hass = hass
+        self.topic_prefix = topic_prefix
+        self.mode = mode
+        self.changes_only = changes_only
+        self.full_refresh_every = max(1, full_refresh_every)
+        self._LOGGER = logger
+        self._deadbands = {}
+        self._deadband_prefixes = []
+        for key, deadband in deadbands.items():
+            if key.endswith("_"):
+                self._deadband_prefixes.append((key, deadband))
+            else:
+                self._deadbands[key] = deadband
+        self._last = {}
+        self._samples = 0
+        self.publish_count = 0
+
+    def _deadband(self, field: str) -> float:
+        deadband = self._deadbands.get(field)
+        if deadband is None:
+            deadband = 0
+            for prefix, prefix_deadband in self._deadband_prefixes:
+                if field.startswith(prefix):
+                    deadband = prefix_deadband
+                    break
+            self._deadbands[field] = deadband
+        return deadband
+
+    def changed_fields(self, sample) -> dict:
+        """Returns the fields due for publishing and records them as published."""
+        full_refresh = not self.changes_only or self._samples % self.full_refresh_every == 0
+        self._samples += 1
+        last = self._last
+        changed = {}
+        for field, value in flatten(sample.as_dict()):
+            if not full_refresh and field in last:
+                previous = last[field]
+                if isinstance(value, str) or isinstance(previous, str):
+                    if value == previous:
+                        continue
+                elif value == previous or abs(value - previous) < self._deadband(field) - 1e-9:
+                    continue
+            changed[field] = value
+            last[field] = value
+        return changed
+
+    async def _send(self, topic: str, payload: str):
+        from homeassistant.components import mqtt
+
+        await mqtt.async_publish(self.hass, topic, payload, qos=0, retain=False)
+
+    async def async_publish(self, sample):
+        fields = self.changed_fields(sample)
+        if not fields:
+            return
+
+        if self.mode == PUBLISH_MODE_JSON:
+            await self._send(f"{self.topic_prefix}/state", json.dumps(fields, separators=(',', ':')))
+            self.publish_count += 1
+            return
+
+        await asyncio.gather(*(
+            self._send(f"{self.topic_prefix}/{field}", json.dumps(value))
+            for field, value in fields.items()
+        ))
+        self.publish_count += len(fields)
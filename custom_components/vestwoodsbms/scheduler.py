@@ -0,0 +1,193 @@
+import asyncio
+import logging
+
+from .vestwoods_bms_client import PollResult, is_ble_error
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 3  # Concurrent connections the adapter is trusted with
+DEFAULT_STAGGER = 2.0  # Seconds between the first polls of consecutive clients
+
+
+def _create_task(coro, name: str) -> asyncio.Task:
+    return asyncio.get_running_loop().create_task(coro, name=name)
+
+
+class AdaptiveInterval:
+    """Picks the delay before the next poll from the last sample.
+
+    Polling drops straight to min_interval while a fault or alert bit is set,
+    the current is high or just stepped, and halves while the cell spread
+    widens. Otherwise it backs off by backoff per sample up to max_interval.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+        high_current: float = 20.0,
+        current_step: float = 5.0,
+        spread_step: float = 0.005,
+        backoff: float = 1.5,
+    ):
+        self.min_interval = min(interval, min_interval if min_interval is not None else interval)
+        self.max_interval = max(interval, max_interval if max_interval is not None else interval)
+        self.interval = interval
+        self.high_current = high_current
+        self.current_step = current_step
+        self.spread_step = spread_step
+        self.backoff = backoff
+        self._last_current = None
+        self._last_spread = None
+
+    def update(self, sample) -> float:
+        """Records a BmsSample and returns the delay before the next poll."""
+        current = sample.total_current
+        spread = sample.max_cell_voltage - sample.min_cell_voltage
+
+        if (
+            sample.faults
+            or sample.alerts
+            or abs(current) >= self.high_current
+            or (self._last_current is not None and abs(current - self._last_current) >= self.current_step)
+        ):
+            self.interval = self.min_interval
+        elif self._last_spread is not None and spread - self._last_spread >= self.spread_step:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+
+        self._last_current = current
+        self._last_spread = spread
+        return self.interval
+
+
+class BLEScheduler:
+    """Shares one Bluetooth adapter between the BMS clients of all config entries.
+
+    Every connected client holds one of max_connections slots. While all clients
+    fit, connections are kept open between polls; once there are more clients
+    than slots, each poll becomes a short connect-poll-disconnect session so the
+    slots rotate between packs. The limit can be changed while polling with
+    set_max_connections().
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        stagger: float = DEFAULT_STAGGER,
+        logger: logging.Logger = _LOGGER,
+    ):
+        self.max_connections = max_connections
+        self.stagger = stagger
+        self._LOGGER = logger
+        self._free = asyncio.Condition()
+        self._holding = set()
+        self._tasks = {}
+
+    @property
+    def persistent(self) -> bool:
+        """Whether every client can keep its connection open."""
+        return len(self._tasks) <= self.max_connections
+
+    async def set_max_connections(self, max_connections: int):
+        """Changes how many clients may be connected at once.
+
+        Clients above a lowered limit keep their link until their next
+        release; a raised limit lets waiting clients connect right away.
+        """
+        self.max_connections = max_connections
+        async with self._free:
+            self._free.notify_all()
+
+    def add(
+        self,
+        client,
+        refresh_interval: int,
+        min_interval: int | None = None,
+        max_interval: int | None = None,
+        create_task=None,
+    ):
+        """Starts polling a client, offset from the clients already scheduled.
+
+        Without min_interval and max_interval the client is polled every
+        refresh_interval seconds; otherwise the interval adapts to the pack
+        state within those limits. create_task(coro, name) starts the poll
+        loop, by default as a plain task of the running loop, so a host can
+        track it.
+        """
+        delay = (len(self._tasks) * self.stagger) % max(refresh_interval, 1)
+        interval = AdaptiveInterval(refresh_interval, min_interval, max_interval)
+        if create_task is None:
+            create_task = _create_task
+        self._tasks[client] = create_task(
+            self._run_client(client, interval, delay), f"{__name__} {client.mac_address}"
+        )
+
+    async def remove(self, client):
+        """Stops polling a client and closes its connection."""
+        task = self._tasks.pop(client, None)
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await self._release(client)
+
+    async def close(self):
+        """Stops polling every client and closes their connections."""
+        for client in list(self._tasks):
+            await self.remove(client)
+
+    async def _release(self, client):
+        try:
+            await client.disconnect()
+        finally:
+            if client in self._holding:
+                self._holding.discard(client)
+                async with self._free:
+                    self._free.notify()
+
+    async def poll(self, client) -> PollResult:
+        """Runs one poll of a client inside a connection slot."""
+        if client not in self._holding:
+            async with self._free:
+                await self._free.wait_for(lambda: len(self._holding) < self.max_connections)
+                self._holding.add(client)
+        try:
+            return await client.poll()
+        finally:
+            if not self.persistent or not client.is_connected:
+                await self._release(client)
+
+    async def _run_client(self, client, interval: AdaptiveInterval, delay: float):
+        await asyncio.sleep(delay)
+        while True:
+            try:
+                # In rotation mode the slot is released after every poll, so the
+                # result, not client.is_connected, tells a timeout from a dead link
+                result = await self.poll(client)
+                if result is PollResult.SAMPLE:
+                    await asyncio.sleep(interval.update(client.last_sample))
+                    continue
+                if result is PollResult.NO_SAMPLE:
+                    self._LOGGER.debug(f"No sample from {client.mac_address} this poll. Retrying in {interval.interval:.0f} seconds...")
+                    await asyncio.sleep(interval.interval)
+                    continue
+                delay = client.backoff.next_delay()
+                self._LOGGER.error(f"Failed to reach {client.mac_address}. Retrying in {delay:.0f} seconds...")
+            except Exception as e:
+                delay = client.backoff.next_delay()
+                if is_ble_error(e):
+                    self._LOGGER.error(f"BLE error polling {client.mac_address}: {e}. Retrying in {delay:.0f} seconds...")
+                else:
+                    self._LOGGER.error(f"An unexpected error occurred polling {client.mac_address}: {e}. Retrying in {delay:.0f} seconds...")
+                try:
+                    await self._release(client)
+                except Exception as e:
+                    # The slot is free again either way; the loop must reach its backoff
+                    self._LOGGER.debug(f"Failed to release {client.mac_address}: {e}")
+            await asyncio.sleep(delay)
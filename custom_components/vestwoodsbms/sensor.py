@@ -2,14 +2,15 @@ from __future__ import annotations
 
 import logging
 
-from homeassistant.components import mqtt
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import DiscoveryInfoType
 
-from .const import DOMAIN, MQTT_TOPIC_PREFIX
+from .const import DOMAIN
+from .coordinator import VestwoodsBMSCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,123 +20,368 @@ async def async_setup_entry(
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up MQTT sensors from a config entry."""
-    mac_address = config_entry.data["mac_address"]
-    mqtt_topic_prefix = f"{MQTT_TOPIC_PREFIX}/{mac_address.replace(':', '_')}"
-    num_cells = config_entry.data.get("number_of_cells", 16)
-    num_temp_sensors = config_entry.data.get("number_of_temperature_sensors", 4)
+    """Set up sensors from a config entry."""
+    if config_entry.data.get("bank"):
+        bank = hass.data[DOMAIN][config_entry.entry_id]["bank"]
+        async_add_entities([
+            VestwoodsBMSSensor(bank, config_entry, key, name, unit, device_class)
+            for key, name, unit, device_class in BANK_SENSORS
+        ])
+        return
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
 
     sensors_to_add = []
 
     # Core BMS sensors
     sensors_to_add.extend([
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "totalVoltage", "Total Voltage", "V", "voltage"
+            coordinator, config_entry, "totalVoltage", "Total Voltage", "V", "voltage"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "soc", "State of Charge", "%", "battery"
+            coordinator, config_entry, "soc", "State of Charge", "%", "battery"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "totalCurrent", "Total Current", "A", "current"
+            coordinator, config_entry, "totalCurrent", "Total Current", "A", "current"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "environmentalTemperature", "Environmental Temperature", "°C", "temperature"
+            coordinator, config_entry, "environmentalTemperature", "Environmental Temperature", "°C", "temperature"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "pcbTemperature", "PCB Temperature", "°C", "temperature"
+            coordinator, config_entry, "pcbTemperature", "PCB Temperature", "°C", "temperature"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "soh", "State of Health", "%", None
+            coordinator, config_entry, "soh", "State of Health", "%", None
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "actualCapacity", "Actual Capacity", "Ah", None
+            coordinator, config_entry, "actualCapacity", "Actual Capacity", "Ah", None
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "surplusCapacity", "Surplus Capacity", "Ah", None
+            coordinator, config_entry, "surplusCapacity", "Surplus Capacity", "Ah", None
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "nominalCapacity", "Nominal Capacity", "Ah", None
+            coordinator, config_entry, "nominalCapacity", "Nominal Capacity", "Ah", None
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "cycleIndex", "Cycle Index", "cycles", None
+            coordinator, config_entry, "cycleIndex", "Cycle Index", "cycles", None
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "maxCellVoltage", "Max Cell Voltage", "V", "voltage"
+            coordinator, config_entry, "maxCellVoltage", "Max Cell Voltage", "V", "voltage"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "minCellVoltage", "Min Cell Voltage", "V", "voltage"
+            coordinator, config_entry, "minCellVoltage", "Min Cell Voltage", "V", "voltage"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "maxTemperatureCellValue", "Max Temperature", "°C", "temperature"
+            coordinator, config_entry, "maxTemperatureCellValue", "Max Temperature", "°C", "temperature"
         ),
         VestwoodsBMSSensor(
-            hass, config_entry, mqtt_topic_prefix, "minTemperatureCellValue", "Min Temperature", "°C", "temperature"
+            coordinator, config_entry, "minTemperatureCellValue", "Min Temperature", "°C", "temperature"
         ),
     ])
 
-    # Dynamically add cell voltage sensors
-    for i in range(1, num_cells + 1):
-        sensors_to_add.append(
-            VestwoodsBMSSensor(
-                hass, config_entry, mqtt_topic_prefix, f"cellVoltage_{i}", f"Cell {i} Voltage", "V", "voltage"
+    # Cell voltage and temperature sensors for the counts the pack reported
+    # last time; the pack's own counts add or confirm them once it answers
+    layout = _CellSensors(hass, coordinator, config_entry, async_add_entities)
+    sensors_to_add.extend(layout.create(
+        config_entry.data.get("number_of_cells", 0),
+        config_entry.data.get("number_of_temperature_sensors", 0),
+    ))
+    config_entry.async_on_unload(
+        coordinator.async_add_key_listener("layout", _StableLayout(LAYOUT_SAMPLES), layout.handle_layout)
+    )
+
+    # Windowed statistics from the rolling history
+    bms_client = hass.data[DOMAIN][config_entry.entry_id]["bms_client"]
+    history = bms_client.history
+    if history is not None:
+        for window in history.windows:
+            label = _window_label(window)
+            for stat, name, unit, device_class in HISTORY_STATS:
+                sensors_to_add.append(
+                    VestwoodsBMSHistorySensor(
+                        coordinator, config_entry, history, window, stat, f"{name} ({label})", unit, device_class
+                    )
+                )
+
+    # Poll timings and link counters, disabled until needed for troubleshooting
+    for key, name, unit in DIAGNOSTIC_SENSORS:
+        sensors_to_add.append(VestwoodsBMSDiagnosticSensor(bms_client, config_entry, key, name, unit))
+
+    async_add_entities(sensors_to_add)
+
+
+DIAGNOSTIC_SENSORS = (
+    ("scan", "Scan Time", "ms"),
+    ("connect", "Connect Time", "ms"),
+    ("write", "Write Time", "ms"),
+    ("wait", "Response Time", "ms"),
+    ("parse", "Parse Time", "ms"),
+    ("publish", "Publish Time", "ms"),
+    ("crcFailures", "CRC Failures", None),
+    ("resyncs", "Resyncs", None),
+    ("discardedBytes", "Discarded Bytes", "B"),
+    ("reconnects", "Reconnects", None),
+    ("timeouts", "Timeouts", None),
+    ("malformedFrames", "Malformed Frames", None),
+)
+
+
+LAYOUT_SAMPLES = 5  # Samples in a row a new cell and probe count must hold before it is used
+
+
+class _StableLayout:
+    """Getter giving the (cells, probes) of a pack once they held for samples samples in a row.
+
+    Until then it keeps giving the last stable layout, None at first, so a
+    single odd frame never reaches the listener.
+    """
+
+    def __init__(self, samples: int) -> None:
+        self.samples = samples
+        self.layout = None
+        self._candidate = None
+        self._seen = 0
+
+    def __call__(self, sample) -> tuple | None:
+        layout = (sample.cell_count, sample.temperature_count)
+        if layout == self._candidate:
+            self._seen += 1
+        else:
+            self._candidate = layout
+            self._seen = 1
+        if self._seen >= self.samples:
+            self.layout = layout
+        return self.layout
+
+
+class _CellSensors:
+    """Creates the per-cell and per-probe sensors of a pack on demand.
+
+    The counts come from batteriesSeriesNumber and batteriesTemperatureNumber
+    of the decoded frames, once they held for LAYOUT_SAMPLES samples, and are
+    cached in the config entry, so the next start creates the same sensors
+    right away. Registry entries of cells and probes beyond the counts the
+    pack reports, left by an earlier install that created a fixed number of
+    them, are removed, but only while the pack reports cells and probes at
+    all.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, config_entry: ConfigEntry, async_add_entities) -> None:
+        self._hass = hass
+        self._coordinator = coordinator
+        self._config_entry = config_entry
+        self._async_add_entities = async_add_entities
+        self.cells = 0
+        self.temperatures = 0
+
+    def create(self, cells: int, temperatures: int) -> list:
+        """Returns the sensors for cells and probes not created yet."""
+        sensors = []
+        for i in range(self.cells + 1, cells + 1):
+            sensors.append(
+                VestwoodsBMSSensor(
+                    self._coordinator, self._config_entry, f"cellVoltage_{i}", f"Cell {i} Voltage", "V", "voltage"
+                )
             )
-        )
+        for i in range(self.temperatures + 1, temperatures + 1):
+            sensors.append(
+                VestwoodsBMSSensor(
+                    self._coordinator, self._config_entry, f"cellTemperature_{i}", f"Cell {i} Temperature", "°C", "temperature"
+                )
+            )
+        self.cells = max(self.cells, cells)
+        self.temperatures = max(self.temperatures, temperatures)
+        return sensors
 
-    # Dynamically add cell temperature sensors
-    for i in range(1, num_temp_sensors + 1):
-        sensors_to_add.append(
-            VestwoodsBMSSensor(
-                hass, config_entry, mqtt_topic_prefix, f"cellTemperature_{i}", f"Cell {i} Temperature", "°C", "temperature"
+    def remove_extra(self, cells: int, temperatures: int) -> None:
+        """Removes the registry entries of cells and probes the pack does not have."""
+        registry = er.async_get(self._hass)
+        prefix = f"{self._config_entry.entry_id}-"
+        for entry in er.async_entries_for_config_entry(registry, self._config_entry.entry_id):
+            key = entry.unique_id.removeprefix(prefix)
+            for name, count in (("cellVoltage_", cells), ("cellTemperature_", temperatures)):
+                if key.startswith(name) and key[len(name):].isdigit() and int(key[len(name):]) > count:
+                    _LOGGER.info(f"Removing {entry.entity_id}, the pack reports {count} {name[:-1]} values")
+                    registry.async_remove(entry.entity_id)
+        self.cells = min(self.cells, cells)
+        self.temperatures = min(self.temperatures, temperatures)
+
+    @callback
+    def handle_layout(self, layout: tuple | None) -> None:
+        if layout is None:
+            return
+        cells, temperatures = layout
+        if cells and temperatures:
+            self.remove_extra(cells, temperatures)
+        sensors = self.create(cells, temperatures)
+        if sensors:
+            _LOGGER.info(f"Adding {len(sensors)} cell sensors for {self._config_entry.data['mac_address']}")
+            self._async_add_entities(sensors)
+
+        data = self._config_entry.data
+        if (data.get("number_of_cells"), data.get("number_of_temperature_sensors")) != layout:
+            self._hass.config_entries.async_update_entry(
+                self._config_entry,
+                data={**data, "number_of_cells": cells, "number_of_temperature_sensors": temperatures},
             )
-        )
 
-    async_add_entities(sensors_to_add)
+
+BANK_SENSORS = (
+    ("soc", "State of Charge", "%", "battery"),
+    ("totalCurrent", "Total Current", "A", "current"),
+    ("totalPower", "Total Power", "W", "power"),
+    ("surplusCapacity", "Surplus Capacity", "Ah", None),
+    ("nominalCapacity", "Nominal Capacity", "Ah", None),
+    ("maxCellVoltage", "Max Cell Voltage", "V", "voltage"),
+    ("minCellVoltage", "Min Cell Voltage", "V", "voltage"),
+    ("cellSpread", "Cell Spread", "V", "voltage"),
+    ("packCount", "Packs Reporting", None, None),
+)
+
+
+def _device_name(config_entry: ConfigEntry) -> str:
+    if config_entry.data.get("bank"):
+        return config_entry.data["name"]
+    return f"Vestwoods BMS {config_entry.data['mac_address']}"
+
+
+HISTORY_STATS = (
+    ("current_min", "Min Current", "A", "current"),
+    ("current_max", "Max Current", "A", "current"),
+    ("current_mean", "Mean Current", "A", "current"),
+    ("imbalance_trend", "Cell Imbalance Trend", "V", "voltage"),
+    ("cell_dvdt", "Max Cell dV/dt", "mV/min", None),
+)
+
+
+def _window_label(seconds: int) -> str:
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600} h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60} min"
+    return f"{seconds} s"
+
+
+def _value_getter(key: str):
+    """Returns a function reading the value for a sensor key from a BmsSample."""
+    if key.startswith("cellVoltage_"):
+        index = int(key[len("cellVoltage_"):]) - 1
+        return lambda sample: sample.cell_voltage(index) if index < sample.cell_count else None
+    if key.startswith("cellTemperature_"):
+        index = int(key[len("cellTemperature_"):]) - 1
+        return lambda sample: sample.temperature(index) if index < sample.temperature_count else None
+    return lambda sample: sample.get(key)
 
 
 class VestwoodsBMSSensor(SensorEntity):
-    """Representation of a Vestwoods BMS MQTT Sensor."""
+    """Representation of a Vestwoods BMS Sensor.
+
+    Listens to the coordinator, or the BatteryBank of a bank entry, for its
+    own key only, so it is called, and writes its state, only when its value
+    changes. Unavailable until the first sample arrives.
+    """
 
     _attr_should_poll = False
+    _attr_available = False
 
     def __init__(
         self,
-        hass: HomeAssistant,
+        coordinator: VestwoodsBMSCoordinator,
         config_entry: ConfigEntry,
-        mqtt_topic_prefix: str,
         key: str,
         name: str,
         unit: str,
         device_class: str | None,
     ) -> None:
-        self._hass = hass
+        self.coordinator = coordinator
         self._config_entry = config_entry
-        self._mqtt_topic = f"{mqtt_topic_prefix}/{key}"
-        self._attr_name = f"Vestwoods BMS {config_entry.data["mac_address"]} {name}"
+        self._key = key
+        self._value = _value_getter(key)
+        self._attr_name = f"{_device_name(config_entry)} {name}"
         self._attr_unique_id = f"{config_entry.entry_id}-{key}"
         self._attr_unit_of_measurement = unit
         self._attr_device_class = device_class
-        self._attr_state = None
+        self._attr_native_value = None
 
     async def async_added_to_hass(self) -> None:
-        """Subscribe to MQTT events."""
-
-        @callback
-        def message_received(message):
-            """Handle new MQTT messages."""
-            try:
-                self._attr_state = float(message.payload)
-                self.async_write_ha_state()
-            except ValueError:
-                _LOGGER.warning("Could not parse payload as float: %s", message.payload)
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_key_listener(self._key, self._value, self._handle_value)
+        )
 
-        await mqtt.async_subscribe(self._hass, self._mqtt_topic, message_received, 1)
+    @callback
+    def _handle_value(self, value) -> None:
+        """Handle a changed value from the BMS client."""
+        self._attr_available = True
+        self._attr_native_value = value
+        self.async_write_ha_state()
 
     @property
     def device_info(self):
         """Return the device info."""
         return {
             "identifiers": {(DOMAIN, self._config_entry.entry_id)},
-            "name": f"Vestwoods BMS {self._config_entry.data["mac_address"]}",
+            "name": _device_name(self._config_entry),
             "manufacturer": "Vestwoods",
-            "model": "BMS",
-        }
\ No newline at end of file
+            "model": "Bank" if self._config_entry.data.get("bank") else "BMS",
+        }
+
+class VestwoodsBMSHistorySensor(VestwoodsBMSSensor):
+    """A statistic of one rolling history window.
+
+    cell_dvdt reports the fastest-moving cell, with every cell's rate as
+    attributes.
+    """
+
+    def __init__(
+        self,
+        coordinator: VestwoodsBMSCoordinator,
+        config_entry: ConfigEntry,
+        history,
+        window: int,
+        stat: str,
+        name: str,
+        unit: str,
+        device_class: str | None,
+    ) -> None:
+        super().__init__(coordinator, config_entry, f"{stat}_{window}", name, unit, device_class)
+        self._stat = stat
+        self._value = lambda sample: history.summary(window)[stat]
+
+    @callback
+    def _handle_value(self, value) -> None:
+        """Handle a changed window statistic."""
+        if self._stat == "cell_dvdt":
+            self._attr_extra_state_attributes = {f"cell_{i + 1}": rate for i, rate in enumerate(value)}
+            value = max(value, key=abs) if value else None
+        super()._handle_value(value)
+
+
+class VestwoodsBMSDiagnosticSensor(SensorEntity):
+    """A poll stage timing or link counter of the BMS client.
+
+    Polled by Home Assistant rather than pushed, so the counters keep updating
+    while the pack does not answer.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, bms_client, config_entry: ConfigEntry, key: str, name: str, unit: str | None) -> None:
+        self._bms_client = bms_client
+        self._config_entry = config_entry
+        self._key = key
+        self._attr_name = f"{_device_name(config_entry)} {name}"
+        self._attr_unique_id = f"{config_entry.entry_id}-diagnostic-{key}"
+        self._attr_unit_of_measurement = unit
+        self._attr_native_value = None
+
+    async def async_update(self) -> None:
+        diagnostics = self._bms_client.diagnostics()
+        if self._key in diagnostics["last"]:
+            seconds = diagnostics["last"][self._key]
+            self._attr_native_value = None if seconds is None else round(seconds * 1000, 1)
+        else:
+            self._attr_native_value = diagnostics[self._key]
+
+    device_info = VestwoodsBMSSensor.device_info
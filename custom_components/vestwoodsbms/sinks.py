@@ -0,0 +1,41 @@
+"""Destinations for decoded samples.
+
+VestwoodsBMSClient hands every BmsSample to each of its sinks in turn. The
+Home Assistant integration uses a CallbackSink feeding its coordinator and an
+MqttPublisher on the HA broker; the headless daemon uses an MqttPublisher on
+its own paho client or a JsonLinesSink.
+"""
+import json
+import sys
+from abc import ABC, abstractmethod
+
+
+class Sink(ABC):
+    """Receives every decoded sample of a client."""
+
+    @abstractmethod
+    async def async_publish(self, sample):
+        """Handles one BmsSample."""
+
+
+class CallbackSink(Sink):
+    """Calls a plain function with every sample, e.g. coordinator.async_set_updated_data."""
+
+    def __init__(self, callback):
+        self._callback = callback
+
+    async def async_publish(self, sample):
+        self._callback(sample)
+
+
+class JsonLinesSink(Sink):
+    """Writes one JSON document per sample, tagged with the pack address, to a stream."""
+
+    def __init__(self, mac_address: str, stream=None):
+        self.mac_address = mac_address
+        self._stream = stream
+
+    async def async_publish(self, sample):
+        stream = self._stream or sys.stdout
+        stream.write(json.dumps({"mac_address": self.mac_address, **sample.as_dict()}, separators=(',', ':')) + "\n")
+        stream.flush()
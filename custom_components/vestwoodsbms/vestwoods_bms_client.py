@@ -1,36 +1,367 @@
 #hacs integration
 import asyncio
 import logging
+import random
 import struct
+import sys
 import time
-from bleak import BleakClient, BleakScanner
-from bleak.exc import BleakError
-from bleak_retry_connector import establish_connection
-from homeassistant.components import mqtt
-import json
+from array import array
+from collections import deque
+from enum import Enum, IntFlag
+
+from .const import DEFAULT_RESPONSE_TIMEOUT
 
 _LOGGER = logging.getLogger(__name__)
 
+# Bound by import_ble() on the first connect, so importing this module stays cheap
+BleakClient = None
+BleakScanner = None
+BleakError = None
+establish_connection = None
+
+
+def import_ble():
+    """Imports bleak and bleak-retry-connector. Names already bound are kept."""
+    global BleakClient, BleakScanner, BleakError, establish_connection
+    from bleak import BleakClient as client, BleakScanner as scanner
+    from bleak.exc import BleakError as error
+    from bleak_retry_connector import establish_connection as establish
+
+    BleakClient = BleakClient or client
+    BleakScanner = BleakScanner or scanner
+    BleakError = BleakError or error
+    establish_connection = establish_connection or establish
+
+
+def is_ble_error(error: BaseException) -> bool:
+    return BleakError is not None and isinstance(error, BleakError)
+
 # Vestwoods BMS BLE UUIDs (Nordic UART Service)
 SERVICE_UUID = "6e400000-b5a3-f393-e0a9-e50e24dcca9e"
 # SWAPPED ROLES based on characteristic discovery:
 TX_CHAR_UUID = "6e400002-b5a3-f393-e0a9-e50e24dcca9e"  # Write to this characteristic (was RX)
 RX_CHAR_UUID = "6e400001-b5a3-f393-e0a9-e50e24dcca9e"  # Read/Notify from this characteristic (was TX)
 
-# Polling command for Vestwoods BMS (from batVestwoods.cpp)
+# Polling command for Vestwoods BMS (from batVestwoods.cpp), STATUS_COMMAND.frame
 POLL_COMMAND = bytearray([0x7a, 0x00, 0x05, 0x00, 0x00, 0x01, 0x0c, 0xe5, 0xa7])
 
-def calc_crc(data: bytearray) -> int:
-    """Calculates the CRC16 for the given data, matching the C++ implementation."""
-    crc = 0xFFFF
-    for byte in data:
-        crc ^= byte
+CRC_INIT = 0xFFFF
+
+
+def _build_crc_table() -> tuple:
+    table = []
+    for byte in range(256):
+        crc = byte
         for _ in range(8):
             if crc & 0x0001:
                 crc = (crc >> 1) ^ 0xA001  # Equivalent to 40961 in decimal
             else:
                 crc >>= 1
-    return crc & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _build_crc_table()
+
+
+def crc_update(crc: int, data) -> int:
+    """Folds more bytes into a running CRC16/MODBUS value.
+
+    Start from CRC_INIT; feeding a frame in any number of chunks gives the same
+    result as calc_crc over the whole frame.
+    """
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def calc_crc(data: bytearray) -> int:
+    """Calculates the CRC16 for the given data, matching the C++ implementation."""
+    return crc_update(CRC_INIT, data)
+
+
+# Field layout of the 0x0001 status frame. Each entry is (key, struct format,
+# converter); converter None keeps the raw integer. The variable-length cell
+# and temperature arrays sit between the three fixed blocks, their counts are
+# taken from the last field of the preceding block.
+_milli = lambda raw: round(raw / 1000.0, 3)
+_centi = lambda raw: round(raw / 100.0, 2)
+_current = lambda raw: round((raw / 100.0) - 300.0, 2)
+_temp = lambda raw: raw - 50
+
+# The converters above as (divisor, offset), value = raw / divisor - offset,
+# for decoders that work on whole columns rather than single values
+LINEAR_SCALES = {
+    _milli: (1000.0, 0.0),
+    _centi: (100.0, 0.0),
+    _current: (100.0, 300.0),
+    _temp: (1.0, 50.0),
+}
+
+STATUS_HEAD_FIELDS = (
+    ('onlineStatus', 'B', None),               # 0
+    ('batteriesSeriesNumber', 'B', None),      # 1
+)
+
+STATUS_MID_FIELDS = (
+    ('maxCellNumber', 'B', None),              # 4
+    ('maxCellVoltage', 'H', _milli),           # 5, 6
+    ('minCellNumber', 'B', None),              # 7
+    ('minCellVoltage', 'H', _milli),           # 8, 9
+    ('totalCurrent', 'H', _current),           # 10, 11
+    ('soc', 'H', _centi),                      # 12, 13
+    ('soh', 'H', _centi),                      # 14, 15
+    ('actualCapacity', 'H', _centi),           # 16, 17
+    ('surplusCapacity', 'H', _centi),          # 18, 19
+    ('nominalCapacity', 'H', _centi),          # 20, 21
+    ('batteriesTemperatureNumber', 'B', None), # 22
+)
+
+STATUS_TAIL_FIELDS = (
+    ('environmentalTemperature', 'H', _temp),  # 25, 26
+    ('pcbTemperature', 'H', _temp),            # 25, 26
+    ('maxTemperatureCellNumber', 'B', None),   # 27
+    ('maxTemperatureCellValue', 'B', _temp),   # 28
+    ('minTemperatureCellNumber', 'B', None),   # 29
+    ('minTemperatureCellValue', 'B', _temp),   # 30
+    ('bmsFault1', 'B', hex),                   # 31
+    ('bmsFault2', 'B', hex),                   # 32
+    ('bmsAlert1', 'B', hex),                   # 33
+    ('bmsAlert2', 'B', hex),                   # 34
+    ('bmsAlert3', 'B', hex),                   # 35
+    ('bmsAlert4', 'B', hex),                   # 36
+    ('cycleIndex', 'H', None),                 # 37, 38
+    ('totalVoltage', 'H', _centi),             # 39, 40
+    ('bmsStatus', 'B', hex),                   # 41
+)
+
+
+class _FieldBlock:
+    """A run of fixed-size fields compiled into a single struct.Struct."""
+
+    __slots__ = ('struct', 'size', 'fields')
+
+    def __init__(self, fields):
+        self.struct = struct.Struct('>' + ''.join(fmt for _, fmt, _ in fields))
+        self.size = self.struct.size
+        self.fields = tuple((key, conv) for key, _, conv in fields)
+
+    def decode_into(self, result: dict, view, offset: int) -> int:
+        for (key, conv), raw in zip(self.fields, self.struct.unpack_from(view, offset)):
+            result[key] = raw if conv is None else conv(raw)
+        return offset + self.size
+
+
+_STATUS_HEAD = _FieldBlock(STATUS_HEAD_FIELDS)
+_STATUS_MID = _FieldBlock(STATUS_MID_FIELDS)
+_STATUS_TAIL = _FieldBlock(STATUS_TAIL_FIELDS)
+_U16 = struct.Struct('>H')
+
+# Big-endian uint16 arrays, keyed by element count
+_u16_arrays = {}
+
+
+def _u16_array(count: int) -> struct.Struct:
+    array_struct = _u16_arrays.get(count)
+    if array_struct is None:
+        array_struct = _u16_arrays[count] = struct.Struct(f'>{count}H')
+    return array_struct
+
+
+# Bytes from the start sentinel to the end of the cell count, and from there
+# to the end of the temperature count; the CRC and end sentinel follow the tail
+_CELLS_AT = 6 + _STATUS_HEAD.size
+_TEMPS_AT = _STATUS_MID.size
+_TRAILER_SIZE = 3
+
+
+def status_layout(data) -> tuple | None:
+    """Returns the (cells, temperatures) counts of a 0x0001 status frame.
+
+    Returns None when the frame is too short for the fields its counts
+    announce, so a malformed but CRC-valid frame is rejected before any of
+    it is decoded.
+    """
+    end = len(data) - _TRAILER_SIZE
+    if end < _CELLS_AT + _TEMPS_AT + _STATUS_TAIL.size:
+        return None
+    cells = data[_CELLS_AT - 1]
+    temps_at = _CELLS_AT + 2 * cells + _TEMPS_AT
+    if temps_at > end:
+        return None
+    temps = data[temps_at - 1]
+    if temps_at + 2 * temps + _STATUS_TAIL.size > end:
+        return None
+    return cells, temps
+
+
+def decode_status(data) -> dict | None:
+    """Decodes the fields of a CRC-valid 0x0001 status frame, None if it is malformed."""
+    if status_layout(data) is None:
+        return None
+    view = memoryview(data)
+    result = {}
+
+    # Start of actual data fields after command
+    offset = _STATUS_HEAD.decode_into(result, view, 6)
+
+    # 2, 3 - cellVoltage (mV)
+    num_cells = result['batteriesSeriesNumber']
+    cells = _u16_array(num_cells)
+    result['cellVoltages'] = [round((raw & 0x7fff) / 1000.0, 3) for raw in cells.unpack_from(view, offset)]
+    offset = _STATUS_MID.decode_into(result, view, offset + cells.size)
+
+    # 23, 24 - cellTemperature (x - 50)
+    temps = _u16_array(result['batteriesTemperatureNumber'])
+    result['cellTemperatures'] = [raw - 50 for raw in temps.unpack_from(view, offset)]
+    _STATUS_TAIL.decode_into(result, view, offset + temps.size)
+
+    return result
+
+
+# Fault and alert bits, with bmsFault1 / bmsAlert1 as the most significant
+# byte. Their meaning is not documented, so they are named by position.
+BmsFault = IntFlag('BmsFault', [(f'FAULT{1 + i // 8}_BIT{i % 8}', 1 << (15 - 8 * (i // 8) - (7 - i % 8))) for i in range(16)])
+BmsAlert = IntFlag('BmsAlert', [(f'ALERT{1 + i // 8}_BIT{i % 8}', 1 << (31 - 8 * (i // 8) - (7 - i % 8))) for i in range(32)])
+
+_SAMPLE_FIELDS = STATUS_HEAD_FIELDS + STATUS_MID_FIELDS + STATUS_TAIL_FIELDS
+# key -> (index into BmsSample.raw, converter)
+_SAMPLE_INDEX = {key: (index, conv) for index, (key, _, conv) in enumerate(_SAMPLE_FIELDS)}
+
+
+def _raw_getter(key: str):
+    index = _SAMPLE_INDEX[key][0]
+    return property(lambda self: self.raw[index])
+
+
+def _scaled_getter(key: str):
+    index, conv = _SAMPLE_INDEX[key]
+    return property(lambda self: conv(self.raw[index]))
+
+
+class BmsSample:
+    """One decoded 0x0001 status frame, kept in raw protocol units.
+
+    The fixed fields stay as the raw integers of the frame, in field table
+    order; cell voltages and temperatures are array('H') of raw words (mV in
+    the low 15 bits, °C + 50). Scaled values are computed on access, by
+    attribute or by parse_response key (sample['soc']). Fault, alert and
+    status bytes are integers; as_dict() gives the exact parse_response dict,
+    hex strings included.
+    """
+
+    __slots__ = ('raw', 'cell_voltages_raw', 'temperatures_raw')
+
+    def __init__(self, raw: tuple, cell_voltages_raw: array, temperatures_raw: array):
+        self.raw = raw
+        self.cell_voltages_raw = cell_voltages_raw
+        self.temperatures_raw = temperatures_raw
+
+    online_status = _raw_getter('onlineStatus')
+    max_cell_number = _raw_getter('maxCellNumber')
+    min_cell_number = _raw_getter('minCellNumber')
+    cycle_index = _raw_getter('cycleIndex')
+    status = _raw_getter('bmsStatus')
+    max_cell_voltage_raw = _raw_getter('maxCellVoltage')
+    min_cell_voltage_raw = _raw_getter('minCellVoltage')
+    total_current_raw = _raw_getter('totalCurrent')
+    max_cell_voltage = _scaled_getter('maxCellVoltage')
+    min_cell_voltage = _scaled_getter('minCellVoltage')
+    total_current = _scaled_getter('totalCurrent')
+    total_voltage = _scaled_getter('totalVoltage')
+    soc = _scaled_getter('soc')
+    soh = _scaled_getter('soh')
+    actual_capacity = _scaled_getter('actualCapacity')
+    surplus_capacity = _scaled_getter('surplusCapacity')
+    nominal_capacity = _scaled_getter('nominalCapacity')
+
+    @property
+    def cell_count(self) -> int:
+        return len(self.cell_voltages_raw)
+
+    @property
+    def temperature_count(self) -> int:
+        return len(self.temperatures_raw)
+
+    @property
+    def cell_voltages(self) -> list:
+        return [round((raw & 0x7fff) / 1000.0, 3) for raw in self.cell_voltages_raw]
+
+    @property
+    def temperatures(self) -> list:
+        return [raw - 50 for raw in self.temperatures_raw]
+
+    def cell_voltage(self, index: int) -> float:
+        return round((self.cell_voltages_raw[index] & 0x7fff) / 1000.0, 3)
+
+    def temperature(self, index: int) -> int:
+        return self.temperatures_raw[index] - 50
+
+    @property
+    def faults(self) -> BmsFault:
+        fault1 = _SAMPLE_INDEX['bmsFault1'][0]
+        return BmsFault(self.raw[fault1] << 8 | self.raw[fault1 + 1])
+
+    @property
+    def alerts(self) -> BmsAlert:
+        alert1 = _SAMPLE_INDEX['bmsAlert1'][0]
+        return BmsAlert(int.from_bytes(bytes(self.raw[alert1:alert1 + 4]), 'big'))
+
+    def __getitem__(self, key: str):
+        if key == 'cellVoltages':
+            return self.cell_voltages
+        if key == 'cellTemperatures':
+            return self.temperatures
+        index, conv = _SAMPLE_INDEX[key]
+        raw = self.raw[index]
+        return raw if conv is None or conv is hex else conv(raw)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> dict:
+        """Returns the same dict parse_response gives for this frame."""
+        result = {}
+        for (key, _, conv), raw in zip(_SAMPLE_FIELDS, self.raw):
+            result[key] = raw if conv is None else conv(raw)
+            if key == 'batteriesSeriesNumber':
+                result['cellVoltages'] = self.cell_voltages
+            elif key == 'batteriesTemperatureNumber':
+                result['cellTemperatures'] = self.temperatures
+        return result
+
+
+def decode_sample(data) -> BmsSample | None:
+    """Decodes a CRC-valid 0x0001 status frame into a BmsSample, None if it is malformed."""
+    layout = status_layout(data)
+    if layout is None:
+        return None
+    cells, temps = layout
+    view = memoryview(data)
+    head = _STATUS_HEAD.struct.unpack_from(view, 6)
+    offset = _CELLS_AT
+
+    cell_voltages = array('H')
+    cell_voltages.frombytes(view[offset:offset + 2 * cells])
+    if sys.byteorder == 'little':
+        cell_voltages.byteswap()
+    offset += 2 * cells
+
+    mid = _STATUS_MID.struct.unpack_from(view, offset)
+    offset += _STATUS_MID.size
+
+    temperatures = array('H')
+    temperatures.frombytes(view[offset:offset + 2 * temps])
+    if sys.byteorder == 'little':
+        temperatures.byteswap()
+    tail = _STATUS_TAIL.struct.unpack_from(view, offset + 2 * temps)
+
+    return BmsSample(head + mid + tail, cell_voltages, temperatures)
+
 
 def parse_response(data: bytearray) -> dict:
     """Parses the BMS response data (command 0x0001)"""
@@ -49,293 +380,627 @@ def parse_response(data: bytearray) -> dict:
         _LOGGER.warning(f"Invalid length: Expected {payload_len + 4}, Got {len(data)}")
         return {}
 
-    # Validate CRC
-    data_for_crc = data[1 : len(data) - 3] # Exclude start, CRC (2 bytes), End (1 byte)
-    calculated_crc = calc_crc(data_for_crc)
+    view = memoryview(data)
 
-    msg_crc_bytes = data[len(data) - 3 : len(data) - 1]
-    msg_crc = struct.unpack('>H', msg_crc_bytes)[0]
+    # Validate CRC
+    calculated_crc = calc_crc(view[1 : len(data) - 3]) # Exclude start, CRC (2 bytes), End (1 byte)
+    msg_crc = _U16.unpack_from(view, len(data) - 3)[0]
 
     if msg_crc != calculated_crc:
         _LOGGER.warning(f"CRC mismatch: Message CRC={hex(msg_crc)}, Calculated CRC={hex(calculated_crc)}")
         return {}
 
     # Parse payload (starting from byte 4: after 0x7a, unknown, length, unknown)
-    offset = 4 
-    command_received = struct.unpack('>H', data[4:6])[0]
+    command_received = _U16.unpack_from(view, 4)[0]
     if command_received != 0x0001:
         _LOGGER.warning(f"Unexpected command received: {hex(command_received)}")
         return {}
-    
-    offset = 6 # Start of actual data fields after command
-    
-    result = {}
 
-    # 0 - onlineStatus
-    result['onlineStatus'] = data[offset]
-    offset += 1
-
-    # 1 - batteriesSeriesNumber
-    num_cells = data[offset]
-    result['batteriesSeriesNumber'] = num_cells
-    offset += 1
-
-    result['cellVoltages'] = []
-    for j in range(num_cells):
-        # 2, 3 - cellVoltage (mV)
-        cell_voltage_raw = struct.unpack('>H', data[offset : offset + 2])[0] & 0x7fff
-        result['cellVoltages'].append(round(cell_voltage_raw / 1000.0, 3))
-        offset += 2
-    
-    # 4 - maxCellNumber
-    result['maxCellNumber'] = data[offset]
-    offset += 1
-
-    # 5,6 - maxCellVoltage
-    result['maxCellVoltage'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 1000.0, 3)
-    offset += 2
-
-    # 7 - minCellNumber
-    result['minCellNumber'] = data[offset]
-    offset += 1
-
-    # 8,9 - minCellVoltage
-    result['minCellVoltage'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 1000.0, 3)
-    offset += 2
-
-    # 10,11 - totalCurrent ( x / 100 - 300 )
-    total_current_raw = struct.unpack('>H', data[offset : offset + 2])[0]
-    result['totalCurrent'] = round((total_current_raw / 100.0) - 300.0, 2)
-    offset += 2
-
-    # 12, 13 - soc (x / 100)
-    result['soc'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 100.0, 2)
-    offset += 2
-
-    # 14, 15 - soh (x / 100)
-    result['soh'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 100.0, 2)
-    offset += 2
-
-    # 16, 17 - actualCapacity (x / 100)
-    result['actualCapacity'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 100.0, 2)
-    offset += 2
-
-    # 18, 19 - surplusCapacity (x / 100)
-    result['surplusCapacity'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 100.0, 2)
-    offset += 2
-
-    # 20, 21 - nominalCapacity (x / 100)
-    result['nominalCapacity'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 100.0, 2)
-    offset += 2
-
-    # 22 - batteriesTemperatureNumber
-    temp_count = data[offset]
-    result['batteriesTemperatureNumber'] = temp_count
-    offset += 1
-
-    result['cellTemperatures'] = []
-    for j in range(temp_count):
-        # 23, 24 - cellTemperature (x - 50)
-        result['cellTemperatures'].append(struct.unpack('>H', data[offset : offset + 2])[0] - 50)
-        offset += 2
-    
-    # 25, 26 - environmentalTemperature
-    result['environmentalTemperature'] = struct.unpack('>H', data[offset : offset + 2])[0] - 50
-    offset += 2
-
-    # 25, 26 - pcbTemperature
-    result['pcbTemperature'] = struct.unpack('>H', data[offset : offset + 2])[0] - 50
-    offset += 2
-
-    # 27 - maxTemperatureCellNumber
-    result['maxTemperatureCellNumber'] = data[offset]
-    offset += 1
-
-    # 28 - maxTemperatureCellValue
-    result['maxTemperatureCellValue'] = data[offset] - 50
-    offset += 1
-
-    # 29 - minTemperatureCellNumber
-    result['minTemperatureCellNumber'] = data[offset]
-    offset += 1
-
-    # 30 - minTemperatureCellValue
-    result['minTemperatureCellValue'] = data[offset] - 50
-    offset += 1
-
-    # 31 bmsFault1
-    result['bmsFault1'] = hex(data[offset])
-    offset += 1
-
-    # 32 bmsFault2
-    result['bmsFault2'] = hex(data[offset])
-    offset += 1
-
-    # 33 bmsAlert1
-    result['bmsAlert1'] = hex(data[offset])
-    offset += 1
-
-    # 34 bmsAlert2
-    result['bmsAlert2'] = hex(data[offset])
-    offset += 1
-
-    # 35 bmsAlert3
-    result['bmsAlert3'] = hex(data[offset])
-    offset += 1
-
-    # 36 bmsAlert4
-    result['bmsAlert4'] = hex(data[offset])
-    offset += 1
-
-    # 37, 38 u.cycleIndex
-    result['cycleIndex'] = struct.unpack('>H', data[offset : offset + 2])[0]
-    offset += 2
-
-    # 39, 40 totalVoltage ( x / 100)
-    result['totalVoltage'] = round(struct.unpack('>H', data[offset : offset + 2])[0] / 100.0, 2)
-    offset += 2
-
-    # 41 bmsStatus
-    result['bmsStatus'] = hex(data[offset])
-    offset += 1
-    
+    result = decode_status(view)
+    if result is None:
+        _LOGGER.warning(f"Malformed status frame: {len(data)} bytes do not hold the announced cells and temperatures")
+        return {}
     return result
 
 
+def frame_command(frame) -> int:
+    """Returns the command ID of a framed message."""
+    return _U16.unpack_from(frame, 4)[0]
+
+
+def build_command(command_id: int, payload: bytes = b"") -> bytes:
+    """Frames a request: 0x7a, 0x00, length, 0x00, command ID, payload, CRC, 0xa7."""
+    body = bytes([0x00, 5 + len(payload), 0x00]) + _U16.pack(command_id) + bytes(payload)
+    return b"\x7a" + body + _U16.pack(calc_crc(body)) + b"\xa7"
+
+
+class Command:
+    """A request the BMS understands.
+
+    decoder turns a CRC-valid response frame into a value, or None to reject
+    a malformed frame; it must not raise on any input. A ttl above zero
+    lets the client reuse the decoded answer for that many seconds instead of
+    asking again, for slow-changing data such as settings.
+    """
+
+    __slots__ = ('command_id', 'name', 'decoder', 'ttl', 'frame')
+
+    def __init__(self, command_id: int, name: str, decoder, ttl: float = 0.0, payload: bytes = b""):
+        self.command_id = command_id
+        self.name = name
+        self.decoder = decoder
+        self.ttl = ttl
+        self.frame = build_command(command_id, payload)
+
+    def decode(self, frame):
+        return self.decoder(frame)
+
+
+COMMANDS = {}
+
+
+def register_command(command: Command) -> Command:
+    """Adds a command to the registry of command IDs the client accepts responses for."""
+    COMMANDS[command.command_id] = command
+    return command
+
+
+# Only the status command is known (from batVestwoods.cpp); other commands
+# are registered once their IDs and layouts are
+STATUS_COMMAND = register_command(Command(0x0001, 'status', decode_sample))
+
+
+class ReceiveBuffer:
+    """Byte buffer with a read cursor.
+
+    Consuming from the front only moves the cursor; the consumed prefix is
+    compacted away once it makes up more than half of the storage, so both
+    operations are amortized O(1) per byte. The buffer never holds more than
+    max_size unread bytes, the oldest ones are dropped to make room.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._data = bytearray()
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return len(self._data) - self._pos
+
+    def __getitem__(self, index: int) -> int:
+        return self._data[self._pos + index]
+
+    def extend(self, chunk) -> int:
+        """Appends a chunk and returns how many unread bytes were dropped to fit it."""
+        dropped = len(self) + len(chunk) - self.max_size
+        if dropped <= 0:
+            dropped = 0
+        elif len(chunk) >= self.max_size:
+            self.clear()
+            chunk = memoryview(chunk)[len(chunk) - self.max_size:]
+        else:
+            self.consume(dropped)
+        self._data.extend(chunk)
+        return dropped
+
+    def find(self, sub: bytes) -> int:
+        index = self._data.find(sub, self._pos)
+        return index if index == -1 else index - self._pos
+
+    def consume(self, count: int):
+        self._pos += count
+        if self._pos >= len(self._data):
+            self.clear()
+        elif self._pos > 512 and self._pos * 2 > len(self._data):
+            del self._data[:self._pos]
+            self._pos = 0
+
+    def take(self, count: int) -> bytes:
+        chunk = bytes(self._data[self._pos:self._pos + count])
+        self.consume(count)
+        return chunk
+
+    def unpack_from(self, fmt: struct.Struct, offset: int) -> tuple:
+        return fmt.unpack_from(self._data, self._pos + offset)
+
+    def view(self, start: int, end: int) -> memoryview:
+        """Returns a view of unread bytes [start, end); release it before the next extend."""
+        return memoryview(self._data)[self._pos + start:self._pos + end]
+
+    def clear(self):
+        self._data.clear()
+        self._pos = 0
+
+
+class FrameReassembler:
+    """Reassembles notification chunks into CRC-valid frames.
+
+    Chunks are fed in as they arrive; on_frame is called with every complete
+    frame whose sentinels and CRC check out. The CRC of the frame being
+    assembled is folded in as its bytes land, so validating it once the end
+    sentinel arrives only costs the last chunk.
+    """
+
+    def __init__(self, on_frame, logger: logging.Logger = _LOGGER, max_buffer: int = 4096):
+        self._on_frame = on_frame
+        self._LOGGER = logger
+        self.buffer = ReceiveBuffer(max_buffer)
+        self.crc_failures = 0
+        self.resyncs = 0
+        self.discarded_bytes = 0
+        self._reset_crc()
+
+    def _reset_crc(self):
+        self._crc = CRC_INIT
+        self._crc_pos = 1  # Next frame offset to fold into the CRC (after the start byte)
+
+    def clear(self):
+        self.buffer.clear()
+        self._reset_crc()
+
+    def _discard(self, count: int):
+        self.resyncs += 1
+        self.discarded_bytes += count
+        self.buffer.consume(count)
+        self._reset_crc()
+
+    def feed(self, data):
+        buffer = self.buffer
+        dropped = buffer.extend(data)
+        if dropped:
+            self._LOGGER.warning(f"Receive buffer full. Dropped {dropped} bytes.")
+            self.discarded_bytes += dropped
+            self._reset_crc()
+
+        while buffer:
+            start_index = buffer.find(b'\x7a')
+            if start_index == -1:
+                self._LOGGER.debug("No start sentinel found in buffer. Discarding.")
+                self.resyncs += 1
+                self.discarded_bytes += len(buffer)
+                self.clear()
+                break
+
+            if start_index > 0:
+                self._LOGGER.debug(f"Discarding {start_index} bytes before start sentinel.")
+                self._discard(start_index)
+
+            if len(buffer) < 4:
+                self._LOGGER.debug("Buffer too small for header. Waiting for more data.")
+                break
+
+            payload_len = buffer[2]
+            total_len = payload_len + 4
+            crc_end = total_len - 3  # Exclude CRC (2 bytes), End (1 byte)
+
+            if len(buffer) < total_len:
+                self._fold_crc(min(len(buffer), crc_end))
+                self._LOGGER.debug(f"Incomplete message. Got {len(buffer)}, expected {total_len}. Waiting for more data.")
+                break
+
+            if total_len < 8:
+                self._LOGGER.warning(f"Invalid length: {total_len}. Discarding.")
+                self._discard(1)
+                continue
+
+            if buffer[total_len - 1] != 0xa7:
+                self._LOGGER.warning("Message does not end with sentinel. Discarding.")
+                self._discard(1) # Discard the 0x7a and retry
+                continue
+
+            self._fold_crc(crc_end)
+            calculated_crc = self._crc
+            msg_crc = buffer.unpack_from(_U16, crc_end)[0]
+            message = buffer.take(total_len)
+            self._reset_crc()
+
+            if msg_crc != calculated_crc:
+                self.crc_failures += 1
+                self._LOGGER.warning(f"CRC mismatch: Message CRC={hex(msg_crc)}, Calculated CRC={hex(calculated_crc)}")
+                continue
+
+            self._on_frame(message)
+
+    def _fold_crc(self, end: int):
+        if end > self._crc_pos:
+            with self.buffer.view(self._crc_pos, end) as view:
+                self._crc = crc_update(self._crc, view)
+            self._crc_pos = end
+
+
+class PollResult(Enum):
+    """Outcome of one VestwoodsBMSClient.poll()."""
+
+    SAMPLE = 'sample'            # A sample was read and published
+    NO_SAMPLE = 'no_sample'      # Still connected, but no valid answer in time
+    UNREACHABLE = 'unreachable'  # Connecting failed or the link dropped during the poll
+
+
+class Backoff:
+    """Jittered exponential backoff between reconnect attempts."""
+
+    def __init__(self, base: float = 2.0, cap: float = 300.0):
+        self.base = base
+        self.cap = cap
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.cap, self.base * 2 ** self.attempts)
+        self.attempts += 1
+        return random.uniform(delay / 2, delay)
+
+    def reset(self):
+        self.attempts = 0
+
+
+class PollStats:
+    """Monotonic per-stage timings and failure counters of one client.
+
+    last holds the duration of each stage of the most recent poll and total
+    the sum over all polls, in seconds; a stage that did not run in the last
+    poll keeps its previous value.
+    """
+
+    STAGES = ('scan', 'connect', 'write', 'wait', 'parse', 'publish')
+
+    def __init__(self):
+        self.last = dict.fromkeys(self.STAGES)
+        self.total = dict.fromkeys(self.STAGES, 0.0)
+        self.polls = 0
+        self.samples = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.connect_failures = 0
+        self.timeouts = 0
+        self.malformed = 0
+
+    def record(self, stage: str, started: float) -> float:
+        """Records a stage that began at started and returns the current time."""
+        now = time.monotonic()
+        self.last[stage] = now - started
+        self.total[stage] += now - started
+        return now
+
+    def as_dict(self) -> dict:
+        return {
+            'last': dict(self.last),
+            'total': dict(self.total),
+            'polls': self.polls,
+            'samples': self.samples,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'connectFailures': self.connect_failures,
+            'timeouts': self.timeouts,
+            'malformedFrames': self.malformed,
+        }
+
+
 class VestwoodsBMSClient:
     def __init__(
         self,
         mac_address: str,
         hass,
-        mqtt_topic_prefix: str,
         logger: logging.Logger = _LOGGER,
+        response_timeout: float = DEFAULT_RESPONSE_TIMEOUT,
+        sinks=(),
+        frame_log=None,
+        history=None,
+        extra_commands=(),
     ):
         self.mac_address = mac_address.upper()
         self.hass = hass
-        self.mqtt_topic_prefix = mqtt_topic_prefix
         self._LOGGER = logger
-        self.notification_data = bytearray()
+        self.response_timeout = response_timeout
+        self.sinks = list(sinks)
+        self.frame_log = frame_log
+        self.history = history
+        self.last_sample = None
+        self._reassembler = FrameReassembler(self._on_frame, logger)
+        self.extra_commands = tuple(extra_commands)
+        self.responses = {}
+        self._pending = {}
+        self._cache = {}
         self.client = None
         self._is_connected = False
+        self._ble_device = None
+        self._closing = False
+        self.backoff = Backoff()
+        self._dropped_at = None
+        self.last_recovery_time = None
+        self.stats = PollStats()
+        self._profiler = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._is_connected
 
-    def on_disconnect(self, client: BleakClient):
-        self._LOGGER.warning(f"Disconnected from {self.mac_address}")
+    def on_disconnect(self, client: "BleakClient"):
+        if not self._closing:
+            self._LOGGER.warning(f"Disconnected from {self.mac_address}")
+            self._mark_dropped()
         self._is_connected = False
+        self._reassembler.clear()
+        for pending in self._pending.values():
+            for future in pending:
+                if not future.done():
+                    future.set_exception(BleakError(f"Disconnected from {self.mac_address}"))
+        self._pending.clear()
+
+    def _mark_dropped(self):
+        if self._dropped_at is None:
+            self._dropped_at = time.monotonic()
+
+    def _cached_device(self):
+        """Returns the freshest known BLEDevice without scanning."""
+        if self.hass is not None:
+            # bluetooth is only an after_dependency; without it, fall back to
+            # the last device and the scan in connect()
+            try:
+                from homeassistant.components import bluetooth
 
-    async def connect(self):
-        self._LOGGER.info(f"Searching for device {self.mac_address}...")
-        device = await BleakScanner.find_device_by_address(self.mac_address, timeout=20.0)
-
-        if not device:
-            self._LOGGER.warning(f"Could not find device with address {self.mac_address}")
-            return False
-
-        self._LOGGER.info(f"Found device: {device.name} ({device.address})")
+                device = bluetooth.async_ble_device_from_address(self.hass, self.mac_address, connectable=True)
+            except Exception as e:
+                self._LOGGER.debug(f"Home Assistant Bluetooth lookup unavailable: {e}")
+                device = None
+            if device:
+                return device
+        return self._ble_device
 
+    async def _establish(self, device, max_attempts: int):
         self.client = await establish_connection(
             BleakClient,
             device,
             name=self.mac_address,
             disconnected_callback=self.on_disconnect,
+            max_attempts=max_attempts,
         )
+        self._ble_device = device
+
+    async def _ensure_ble(self):
+        if None in (BleakClient, BleakScanner, BleakError, establish_connection):
+            await asyncio.get_running_loop().run_in_executor(None, import_ble)
+
+    async def connect(self):
+        await self._ensure_ble()
+        stats = self.stats
+        started = time.monotonic()
+        device = self._cached_device()
+        if device:
+            try:
+                await self._establish(device, max_attempts=2)
+            except BleakError as e:
+                self._LOGGER.debug(f"Connecting to cached device failed: {e}. Scanning instead.")
+                self._ble_device = None
+                device = None
+
+        if not device:
+            self._LOGGER.info(f"Searching for device {self.mac_address}...")
+            device = await BleakScanner.find_device_by_address(self.mac_address, timeout=20.0)
+            started = stats.record('scan', started)
+
+            if not device:
+                self._LOGGER.warning(f"Could not find device with address {self.mac_address}")
+                stats.connect_failures += 1
+                return False
+
+            self._LOGGER.info(f"Found device: {device.name} ({device.address})")
+            try:
+                await self._establish(device, max_attempts=4)
+            except BleakError:
+                stats.connect_failures += 1
+                raise
+
         self._is_connected = self.client.is_connected
-        if self._is_connected:
+        stats.record('connect', started)
+        if not self._is_connected:
+            stats.connect_failures += 1
+        else:
+            stats.connects += 1
             self._LOGGER.info(f"Connected to {device.name} ({device.address})")
+            # Notifications stay enabled for the lifetime of the connection
+            self._reassembler.clear()
+            await self.client.start_notify(RX_CHAR_UUID, self._notification_handler)
+            self.backoff.reset()
+            if self._dropped_at is not None:
+                stats.reconnects += 1
+                self.last_recovery_time = time.monotonic() - self._dropped_at
+                self._dropped_at = None
+                self._LOGGER.info(f"Recovered connection to {self.mac_address} after {self.last_recovery_time:.1f} seconds")
         return self._is_connected
 
     async def disconnect(self):
         if self.client and self._is_connected:
-            await self.client.disconnect()
-            self._is_connected = False
+            try:
+                await self.client.stop_notify(RX_CHAR_UUID)
+            except BleakError as e:
+                self._LOGGER.debug(f"Failed to stop notifications: {e}")
+            self._closing = True
+            try:
+                await self.client.disconnect()
+            except BleakError as e:
+                self._LOGGER.debug(f"Failed to disconnect cleanly: {e}")
+            finally:
+                self._closing = False
+                self._is_connected = False
             self._LOGGER.info(f"Disconnected from {self.mac_address}")
 
     def _notification_handler(self, sender, data):
-        """Accumulates data from notifications."""
-        self.notification_data.extend(data)
+        """Feeds notification chunks to the frame reassembler."""
+        self._reassembler.feed(data)
+
+    def _on_frame(self, frame: bytes):
+        if self.frame_log is not None:
+            self.frame_log.append(frame)
+        command_received = frame_command(frame)
+        if command_received not in COMMANDS:
+            self._LOGGER.warning(f"Unexpected command received: {hex(command_received)}")
+            return
+        pending = self._pending.get(command_received)
+        if not pending:
+            self._LOGGER.debug(f"Discarding unsolicited response to {hex(command_received)}.")
+            return
+        future = pending.popleft()
+        if not future.done():
+            future.set_result(frame)
+
+    async def fetch(self, *commands: Command) -> dict:
+        """Returns the decoded answers to commands by command ID.
+
+        Answers still within their command's TTL come from the cache. The
+        others are written back to back and their responses, matched by
+        command ID, are awaited together, so several commands cost one
+        round trip. Commands that time out are missing from the result.
+        """
+        now = time.monotonic()
+        results = {}
+        stale = []
+        for command in commands:
+            cached = self._cache.get(command.command_id)
+            if cached is not None and cached[0] > now:
+                results[command.command_id] = cached[1]
+            elif command not in stale:
+                stale.append(command)
+        if not stale:
+            return results
+
+        stats = self.stats
+        loop = asyncio.get_running_loop()
+        futures = {}
+        try:
+            started = time.monotonic()
+            for command in stale:
+                future = futures[command.command_id] = loop.create_future()
+                self._pending.setdefault(command.command_id, deque()).append(future)
+                await self.client.write_gatt_char(TX_CHAR_UUID, command.frame, response=False)
+            started = stats.record('write', started)
+            await asyncio.wait(futures.values(), timeout=self.response_timeout)
+            started = stats.record('wait', started)
+        finally:
+            for command_id, future in futures.items():
+                pending = self._pending.get(command_id)
+                if pending and future in pending:
+                    pending.remove(future)
+                if not future.done():
+                    future.cancel()
+
+        error = None
+        for command in stale:
+            future = futures[command.command_id]
+            if future.cancelled():
+                self._LOGGER.warning(f"No response to {command.name} within {self.response_timeout} seconds.")
+                stats.timeouts += 1
+            elif future.exception() is not None:
+                error = future.exception()
+            else:
+                value = command.decode(future.result())
+                if value is None:
+                    self._LOGGER.warning(f"Rejected malformed {command.name} response.")
+                    stats.malformed += 1
+                    continue
+                results[command.command_id] = value
+                if command.ttl > 0:
+                    self._cache[command.command_id] = (time.monotonic() + command.ttl, value)
+        if error is not None:
+            raise error
+        stats.record('parse', started)
+        return results
 
     async def read_and_publish_data(self):
         if not self.client or not self._is_connected:
             self._LOGGER.warning("Not connected to BMS. Skipping data read.")
-            return
+            return False
 
+        stats = self.stats
+        stats.polls += 1
         try:
-            await self.client.start_notify(RX_CHAR_UUID, self._notification_handler)
-            await self.client.write_gatt_char(TX_CHAR_UUID, POLL_COMMAND, response=False)
-            await asyncio.sleep(2)  # Wait for notifications
-            await self.client.stop_notify(RX_CHAR_UUID)
-
-            while self.notification_data:
-                start_index = self.notification_data.find(b'\x7a')
-                if start_index == -1:
-                    self._LOGGER.debug("No start sentinel found in buffer. Discarding.")
-                    self.notification_data.clear()
-                    break
-
-                if start_index > 0:
-                    self._LOGGER.debug(f"Discarding {start_index} bytes before start sentinel.")
-                    self.notification_data = self.notification_data[start_index:]
-
-                if len(self.notification_data) < 4:
-                    self._LOGGER.debug("Buffer too small for header. Waiting for more data.")
-                    break
-
-                payload_len = self.notification_data[2]
-                total_len = payload_len + 4
-
-                if len(self.notification_data) < total_len:
-                    self._LOGGER.debug(f"Incomplete message. Got {len(self.notification_data)}, expected {total_len}. Waiting for more data.")
-                    break
-
-                message = self.notification_data[:total_len]
-                
-                if not message.endswith(b'\xa7'):
-                    self._LOGGER.warning("Message does not end with sentinel. Discarding.")
-                    self.notification_data = self.notification_data[1:] # Discard the 0x7a and retry
-                    continue
-
-                parsed_data = parse_response(message)
-                if parsed_data:
-                    self._LOGGER.info("--- Parsed BMS Data ---")
-                    for key, value in parsed_data.items():
-                        if key == 'cellVoltages':
-                            for i, voltage in enumerate(value):
-                                topic = f"{self.mqtt_topic_prefix}/cellVoltage_{i+1}"
-                                await mqtt.async_publish(self.hass, topic, json.dumps(voltage), qos=0, retain=False)
-                        elif key == 'cellTemperatures':
-                            for i, temp in enumerate(value):
-                                topic = f"{self.mqtt_topic_prefix}/cellTemperature_{i+1}"
-                                await mqtt.async_publish(self.hass, topic, json.dumps(temp), qos=0, retain=False)
-                        else:
-                            topic = f"{self.mqtt_topic_prefix}/{key}"
-                            await mqtt.async_publish(self.hass, topic, json.dumps(value), qos=0, retain=False)
-                else:
-                    self._LOGGER.warning("Failed to parse BMS data.")
-                
-                self.notification_data = self.notification_data[total_len:]
+            results = await self.fetch(STATUS_COMMAND, *self.extra_commands)
+            for command in self.extra_commands:
+                if command.command_id in results:
+                    self.responses[command.name] = results[command.command_id]
+            sample = results.get(STATUS_COMMAND.command_id)
+            if sample is None:
+                return False
+
+            started = time.monotonic()
+            self.last_sample = sample
+            stats.samples += 1
+            if self.history is not None:
+                self.history.append(sample, time.monotonic())
+            for sink in self.sinks:
+                await sink.async_publish(sample)
+            stats.record('publish', started)
+            return True
 
         except BleakError as e:
             self._LOGGER.error(f"BLE error during read: {e}")
+            self._mark_dropped()
             await self.disconnect()
+            return False
 
-    async def run(self, refresh_interval: int = 30):
-        while True:
-            try:
-                if not self._is_connected:
-                    self._LOGGER.info("Attempting to connect to BMS...")
-                    if not await self.connect():
-                        self._LOGGER.error("Failed to connect to BMS. Retrying in 60 seconds...")
-                        await asyncio.sleep(60)
-                        continue
-
-                await self.read_and_publish_data()
-
-            except BleakError as e:
-                self._LOGGER.error(f"BLE error during run: {e}. Attempting to reconnect in 60 seconds...")
-                await self.disconnect()
-                await asyncio.sleep(60)
-            except Exception as e:
-                self._LOGGER.error(f"An unexpected error occurred: {e}. Retrying in 60 seconds...")
-                await self.disconnect()
-                await asyncio.sleep(60)
-            finally:
-                await asyncio.sleep(refresh_interval)
+        finally:
+            # Frames of timed out or rejected polls are worth the most in a post-mortem
+            if self.frame_log is not None:
+                await self.frame_log.async_flush()
+
+    async def poll(self) -> PollResult:
+        """Connects if needed and reads one sample.
+
+        A response timeout or a rejected frame leaves the link up and gives
+        NO_SAMPLE, so callers can retry on their normal interval rather than
+        back off as for UNREACHABLE.
+        """
+        if self._profiler is not None:
+            return await self._profiled_poll()
+        return await self._poll()
+
+    async def _poll(self) -> PollResult:
+        if not self._is_connected:
+            self._LOGGER.info("Attempting to connect to BMS...")
+            if not await self.connect():
+                return PollResult.UNREACHABLE
+        if await self.read_and_publish_data():
+            return PollResult.SAMPLE
+        return PollResult.NO_SAMPLE if self._is_connected else PollResult.UNREACHABLE
+
+    def start_profile(self, cycles: int, path: str):
+        """Profiles the next cycles polls and dumps the cProfile stats to path.
+
+        The profiler runs from the start to the end of each poll, so it also
+        sees whatever else the event loop runs while the poll awaits.
+        """
+        import cProfile
+
+        self._profiler = (cProfile.Profile(), cycles, path)
+        self._LOGGER.info(f"Profiling {cycles} polls of {self.mac_address} to {path}")
+
+    async def _profiled_poll(self) -> PollResult:
+        profiler, cycles, path = self._profiler
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another pack's poll is being profiled, try again on the next poll
+            return await self._poll()
+        try:
+            return await self._poll()
+        finally:
+            profiler.disable()
+            if cycles > 1:
+                self._profiler = (profiler, cycles - 1, path)
+            else:
+                self._profiler = None
+                await asyncio.get_running_loop().run_in_executor(None, profiler.dump_stats, path)
+                self._LOGGER.info(f"Wrote poll profile of {self.mac_address} to {path}")
+
+    def diagnostics(self) -> dict:
+        """Returns timings, counters and link state for troubleshooting."""
+        reassembler = self._reassembler
+        return {
+            **self.stats.as_dict(),
+            'crcFailures': reassembler.crc_failures,
+            'resyncs': reassembler.resyncs,
+            'discardedBytes': reassembler.discarded_bytes,
+            'bufferedBytes': len(reassembler.buffer),
+            'connected': self._is_connected,
+            'backoffAttempts': self.backoff.attempts,
+            'lastRecoveryTime': self.last_recovery_time,
+        }
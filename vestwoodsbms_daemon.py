@@ -0,0 +1,30 @@
+"""Runs the Vestwoods BMS daemon without Home Assistant.
+
+The integration package __init__ needs Home Assistant, so the engine modules
+are imported without it. See custom_components/vestwoodsbms/daemon.py.
+
+    python vestwoodsbms_daemon.py AA:BB:CC:DD:EE:01 --broker localhost
+"""
+import importlib
+import sys
+import types
+from pathlib import Path
+
+PACKAGE = "custom_components.vestwoodsbms"
+PACKAGE_DIR = Path(__file__).resolve().parent / "custom_components" / "vestwoodsbms"
+
+
+def load(module: str):
+    """Imports a module of the integration, skipping the package __init__."""
+    if PACKAGE not in sys.modules:
+        namespace = types.ModuleType("custom_components")
+        namespace.__path__ = [str(PACKAGE_DIR.parent)]
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(PACKAGE_DIR)]
+        sys.modules.setdefault("custom_components", namespace)
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{module}")
+
+
+if __name__ == "__main__":
+    load("daemon").main()